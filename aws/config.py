@@ -1,5 +1,7 @@
 
 import os
+from dataclasses import dataclass
+from functools import lru_cache
 
 # AWS region & base settings
 REGION = os.getenv("AWS_REGION", "us-east-1")
@@ -12,11 +14,24 @@ KEY_NAME = os.getenv("KEY_NAME", "vockey")
 SECURITY_GROUP_ID = os.getenv("SECURITY_GROUP_ID", "sg-0cd0c0f5fde90d502")
 
 # EC2 instance types
-INSTANCE_TYPE_MANAGER = os.getenv("INSTANCE_TYPE_MANAGER", "t2.micro")
-INSTANCE_TYPE_WORKER = os.getenv("INSTANCE_TYPE_WORKER", "t2.micro")
+# DB nodes run the benchmarks: t3 in "unlimited" credit mode (see CPU_CREDITS)
+# is not throttled mid-run like t2.micro. Use m5.large for fixed performance.
+INSTANCE_TYPE_MANAGER = os.getenv("INSTANCE_TYPE_MANAGER", "t3.small")
+INSTANCE_TYPE_WORKER = os.getenv("INSTANCE_TYPE_WORKER", "t3.small")
 INSTANCE_TYPE_PROXY = os.getenv("INSTANCE_TYPE_PROXY", "t2.large")
 INSTANCE_TYPE_GATEKEEPER = os.getenv("INSTANCE_TYPE_GATEKEEPER", "t2.large")
 
+# CPU credit mode for burstable (t2/t3/t3a/t4g) instances: "unlimited" | "standard"
+CPU_CREDITS = os.getenv("CPU_CREDITS", "unlimited")
+
+# When "true", only the gatekeeper gets a public IP; manager, workers and proxy
+# stay VPC-internal. Their user-data still downloads packages / Sakila, so only
+# enable this with a NAT gateway in the subnet.
+PRIVATE_BACKEND = os.getenv("PRIVATE_BACKEND", "false").lower() == "true"
+
+# Roles that always keep a public IP (the public entry point)
+PUBLIC_ROLES = ("gatekeeper",)
+
 # Tags
 PROJECT_TAG_KEY = "Project"
 PROJECT_TAG_VALUE = "LOG8415E-Final"
@@ -38,3 +53,57 @@ GIT_REPO_URL = os.getenv(
     "GIT_REPO_URL",
     "https://github.com/Polydana/LOG8415E-final-assignement.git"
 )
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """
+    Immutable snapshot of the settings above, used by the user-data renderers.
+    """
+    region: str
+    ami_id: str
+    key_name: str
+    security_group_id: str
+    instance_type_manager: str
+    instance_type_worker: str
+    instance_type_proxy: str
+    instance_type_gatekeeper: str
+    cpu_credits: str
+    private_backend: bool
+    project_tag_key: str
+    project_tag_value: str
+    mysql_root_password: str
+    mysql_repl_user: str
+    mysql_repl_password: str
+    mysql_sakila_user: str
+    mysql_sakila_password: str
+    remote_project_path: str
+    git_repo_url: str
+
+
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """
+    Build the Config once and return the same instance on every call.
+    """
+    return Config(
+        region=REGION,
+        ami_id=AMI_ID,
+        key_name=KEY_NAME,
+        security_group_id=SECURITY_GROUP_ID,
+        instance_type_manager=INSTANCE_TYPE_MANAGER,
+        instance_type_worker=INSTANCE_TYPE_WORKER,
+        instance_type_proxy=INSTANCE_TYPE_PROXY,
+        instance_type_gatekeeper=INSTANCE_TYPE_GATEKEEPER,
+        cpu_credits=CPU_CREDITS,
+        private_backend=PRIVATE_BACKEND,
+        project_tag_key=PROJECT_TAG_KEY,
+        project_tag_value=PROJECT_TAG_VALUE,
+        mysql_root_password=MYSQL_ROOT_PASSWORD,
+        mysql_repl_user=MYSQL_REPL_USER,
+        mysql_repl_password=MYSQL_REPL_PASSWORD,
+        mysql_sakila_user=MYSQL_SAKILA_USER,
+        mysql_sakila_password=MYSQL_SAKILA_PASSWORD,
+        remote_project_path=REMOTE_PROJECT_PATH,
+        git_repo_url=GIT_REPO_URL,
+    )
@@ -1,15 +1,64 @@
 # aws/ec2_utils.py
-import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Optional
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import WaiterError, ClientError
+from botocore.waiter import WaiterModel, create_waiter_with_client
 
 from . import config
 
 
+# Enough pooled connections for the concurrent callers (tagging, waiters),
+# adaptive client-side rate limiting on throttling, and TCP keep-alive so the
+# sockets stay warm between polls
+_CLIENT_CONFIG = Config(
+    max_pool_connections=16,
+    retries={"max_attempts": 10, "mode": "adaptive"},
+    tcp_keepalive=True,
+)
+
+
+@lru_cache(maxsize=1)
 def get_ec2_client():
-    return boto3.client("ec2", region_name=config.REGION)
+    """
+    Shared EC2 client, built once so every call reuses its connection pool.
+    """
+    session = boto3.session.Session(region_name=config.REGION)
+    return session.client("ec2", config=_CLIENT_CONFIG)
+
+
+BURSTABLE_FAMILIES = ("t2.", "t3.", "t3a.", "t4g.")
+
+
+def _credit_options(instance_type: str) -> Dict:
+    """
+    Extra run_instances kwargs: CPU credit mode for burstable instance types.
+    Other families reject CreditSpecification, so they get nothing.
+    """
+    if not instance_type.startswith(BURSTABLE_FAMILIES):
+        return {}
+    return {"CreditSpecification": {"CpuCredits": config.CPU_CREDITS}}
+
+
+def _network_options(role: str) -> Dict:
+    """
+    Extra run_instances kwargs: security group, and no public IP for backend
+    roles when PRIVATE_BACKEND is enabled.
+    """
+    if not config.PRIVATE_BACKEND or role in config.PUBLIC_ROLES:
+        return {"SecurityGroupIds": [config.SECURITY_GROUP_ID]}
+    return {
+        "NetworkInterfaces": [
+            {
+                "DeviceIndex": 0,
+                "AssociatePublicIpAddress": False,
+                "Groups": [config.SECURITY_GROUP_ID],
+            }
+        ]
+    }
 
 
 def create_instance(
@@ -34,10 +83,11 @@ def create_instance(
             ImageId=config.AMI_ID,
             InstanceType=instance_type,
             KeyName=config.KEY_NAME,
-            SecurityGroupIds=[config.SECURITY_GROUP_ID],
+            **_network_options(role),
             MinCount=1,
             MaxCount=1,
             UserData=user_data,
+            **_credit_options(instance_type),
             TagSpecifications=[
                 {
                     "ResourceType": "instance",
@@ -53,12 +103,83 @@ def create_instance(
     return instance_id
 
 
-def wait_for_instances(instance_ids: List[str]) -> None:
+# Upper bound for a single batched RunInstances call (avoid large partial failures)
+MAX_BATCH_LAUNCH = 20
+
+
+def create_instances(
+    name_prefix: str,
+    role: str,
+    instance_type: str,
+    user_data: str,
+    count: int,
+) -> List[str]:
+    """
+    Launch `count` identical EC2 instances with one RunInstances call.
+    Instances are named <name_prefix>-1 .. <name_prefix>-<count> (by launch index)
+    and their IDs are returned in that order.
+    """
+    if count < 1 or count > MAX_BATCH_LAUNCH:
+        raise ValueError(f"count must be between 1 and {MAX_BATCH_LAUNCH}, got {count}")
+
+    ec2 = get_ec2_client()
+
+    tags = [
+        {"Key": config.PROJECT_TAG_KEY, "Value": config.PROJECT_TAG_VALUE},
+        {"Key": "Role", "Value": role},
+    ]
+
+    try:
+        resp = ec2.run_instances(
+            ImageId=config.AMI_ID,
+            InstanceType=instance_type,
+            KeyName=config.KEY_NAME,
+            **_network_options(role),
+            MinCount=count,
+            MaxCount=count,
+            UserData=user_data,
+            **_credit_options(instance_type),
+            TagSpecifications=[
+                {
+                    "ResourceType": "instance",
+                    "Tags": tags,
+                }
+            ],
+        )
+    except ClientError as e:
+        raise RuntimeError(f"Error launching {count} instances ({name_prefix}): {e}")
+
+    instances = sorted(resp["Instances"], key=lambda i: i["AmiLaunchIndex"])
+    instance_ids = [inst["InstanceId"] for inst in instances]
+
+    # Names differ per instance, so each one gets its own CreateTags call after
+    # launch; the calls are independent and are issued concurrently
+    def tag(idx: int, instance_id: str) -> None:
+        name = f"{name_prefix}-{idx + 1}"
+        try:
+            ec2.create_tags(
+                Resources=[instance_id],
+                Tags=[{"Key": "Name", "Value": name}],
+            )
+        except ClientError as e:
+            raise RuntimeError(f"Error tagging instance {instance_id} as {name}: {e}")
+        print(f"[INFO] Launched instance {instance_id} ({name}, role={role})")
+
+    with ThreadPoolExecutor(max_workers=len(instance_ids)) as pool:
+        for future in [pool.submit(tag, idx, iid) for idx, iid in enumerate(instance_ids)]:
+            future.result()
+
+    return instance_ids
+
+
+def wait_for_instances(instance_ids: List[str]) -> Dict[str, Dict]:
     """
     Wait for all given instances to reach 'running' state.
+    Returns {instance_id: description} from one DescribeInstances call made
+    once they are, so callers can read IPs without describing them again.
     """
     if not instance_ids:
-        return
+        return {}
 
     ec2 = get_ec2_client()
     waiter = ec2.get_waiter("instance_running")
@@ -68,12 +189,46 @@ def wait_for_instances(instance_ids: List[str]) -> None:
         print("[INFO] All instances are running.")
     except WaiterError as e:
         raise RuntimeError(f"Error while waiting for instances: {e}")
+    return get_instance_descriptions(instance_ids)
+
+
+def wait_for_exists(instance_ids: List[str]) -> Dict[str, Dict]:
+    """
+    Wait until the given instances are visible to DescribeInstances. Private IPs
+    are assigned at launch, so they can be read from the returned
+    {instance_id: description} without waiting for 'running'.
+    """
+    if not instance_ids:
+        return {}
+
+    ec2 = get_ec2_client()
+    waiter = ec2.get_waiter("instance_exists")
+    try:
+        waiter.wait(InstanceIds=instance_ids, WaiterConfig={"Delay": 1, "MaxAttempts": 60})
+    except WaiterError as e:
+        raise RuntimeError(f"Error while waiting for instances to exist: {e}")
+    return get_instance_descriptions(instance_ids)
 
 
 def get_instance_description(instance_id: str) -> Dict:
+    return get_instance_descriptions([instance_id])[instance_id]
+
+
+def get_instance_descriptions(instance_ids: List[str]) -> Dict[str, Dict]:
+    """
+    Describe several instances in a single DescribeInstances call.
+    Returns {instance_id: description}.
+    """
+    if not instance_ids:
+        return {}
+
     ec2 = get_ec2_client()
-    resp = ec2.describe_instances(InstanceIds=[instance_id])
-    return resp["Reservations"][0]["Instances"][0]
+    resp = ec2.describe_instances(InstanceIds=instance_ids)
+    return {
+        inst["InstanceId"]: inst
+        for reservation in resp["Reservations"]
+        for inst in reservation["Instances"]
+    }
 
 
 def get_private_ip(instance_id: str) -> str:
@@ -81,30 +236,80 @@ def get_private_ip(instance_id: str) -> str:
     return desc["PrivateIpAddress"]
 
 
+def get_private_ips(instance_ids: List[str]) -> Dict[str, str]:
+    """
+    Private IPs of several instances from one DescribeInstances call.
+    Returns {instance_id: private_ip}.
+    """
+    descs = get_instance_descriptions(instance_ids)
+    return {iid: desc["PrivateIpAddress"] for iid, desc in descs.items()}
+
+
 def get_public_ip(instance_id: str) -> Optional[str]:
     desc = get_instance_description(instance_id)
     return desc.get("PublicIpAddress")
 
 
-def wait_for_ssh(instance_id: str, timeout: int = 600) -> None:
+# Custom waiter: succeeds once the instance is running AND has a public IP.
+_PUBLIC_IP_WAITER_MODEL = WaiterModel(
+    {
+        "version": 2,
+        "waiters": {
+            "PublicIpAssigned": {
+                "operation": "DescribeInstances",
+                "delay": 5,
+                "maxAttempts": 120,
+                "acceptors": [
+                    {
+                        "matcher": "path",
+                        "argument": (
+                            "length(Reservations[].Instances[?State.Name == 'running'"
+                            " && PublicIpAddress][]) > `0`"
+                        ),
+                        "expected": True,
+                        "state": "success",
+                    },
+                    {
+                        "matcher": "pathAny",
+                        "argument": "Reservations[].Instances[].State.Name",
+                        "expected": "terminated",
+                        "state": "failure",
+                    },
+                    # Right after RunInstances the ID may not be visible yet
+                    # (eventual consistency): keep polling instead of failing
+                    {
+                        "matcher": "error",
+                        "expected": "InvalidInstanceID.NotFound",
+                        "state": "retry",
+                    },
+                ],
+            }
+        },
+    }
+)
+
+
+def wait_for_ssh(instance_id: str, timeout: int = 600) -> str:
     """
-    Optional: crude wait until public IP appears (not perfect but okay for this lab).
+    Wait until the instance is running and has a public IP, using a boto3 waiter.
+    Returns the public IP.
     """
     ec2 = get_ec2_client()
-    start = time.time()
-    while time.time() - start < timeout:
-        desc = get_instance_description(instance_id)
-        public_ip = desc.get("PublicIpAddress")
-        state = desc["State"]["Name"]
-        if state == "running" and public_ip:
-            print(f"[INFO] Instance {instance_id} has public IP: {public_ip}")
-            return
+    waiter = create_waiter_with_client("PublicIpAssigned", _PUBLIC_IP_WAITER_MODEL, ec2)
+    delay = 5
+    try:
         print(f"[INFO] Waiting for public IP on {instance_id}...")
-        time.sleep(10)
-    raise TimeoutError(f"Timed out waiting for public IP on {instance_id}")
+        waiter.wait(
+            InstanceIds=[instance_id],
+            WaiterConfig={"Delay": delay, "MaxAttempts": max(1, timeout // delay)},
+        )
+    except WaiterError as e:
+        raise TimeoutError(f"Timed out waiting for public IP on {instance_id}: {e}")
 
+    public_ip = get_public_ip(instance_id)
+    print(f"[INFO] Instance {instance_id} has public IP: {public_ip}")
+    return public_ip
 
-_ec2 = boto3.client("ec2")
 
 def terminate_instances(instance_ids):
     """
@@ -114,13 +319,15 @@ def terminate_instances(instance_ids):
         print("[WARN] terminate_instances called with empty list.")
         return
 
+    ec2 = get_ec2_client()
     try:
         print(f"[INFO] Requesting termination for: {instance_ids}")
-        _ec2.terminate_instances(InstanceIds=instance_ids)
+        ec2.terminate_instances(InstanceIds=instance_ids)
 
-        waiter = _ec2.get_waiter("instance_terminated")
+        waiter = ec2.get_waiter("instance_terminated")
         print("[INFO] Waiting for instances to terminate...")
-        waiter.wait(InstanceIds=instance_ids)
+        # One waiter polls the whole batch: exit time is bounded by the slowest instance
+        waiter.wait(InstanceIds=instance_ids, WaiterConfig={"Delay": 5, "MaxAttempts": 60})
         print("[INFO] All instances terminated successfully.")
 
     except Exception as exc:
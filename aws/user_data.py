@@ -1,279 +1,492 @@
 
-from typing import List
+from functools import lru_cache
+from string import Template
+from typing import Dict, Tuple
 
-from . import config
+from .config import get_config
 
+# Scripts are string.Template objects built once at import; rendering is a
+# single substitute() pass, and bash braces / $ need no f-string escaping.
+# Every render_* function below is also memoized with lru_cache: its arguments
+# are hashable and the config is immutable, so the same inputs always give the
+# same script.
 
-def render_mysql_manager_user_data() -> str:
+
+def _install_packages(packages: str) -> str:
     """
-    User-data script for the MySQL manager instance.
-    - Installs MySQL + sysbench
-    - Loads Sakila
-    - Configures as replication master
-    - Allows remote connections (bind-address = 0.0.0.0)
-    - Creates users for replication and Sakila access from other hosts
-    - Ensures MySQL is actually running and listening
+    apt-get lines for a user-data script.
+    """
+    return (
+        "apt-get update -qq\n"
+        f"apt-get install -y --no-install-recommends {packages}"
+    )
+
+
+def _install_requirements() -> str:
+    """
+    pip line for a user-data script.
+    """
+    return "pip3 install --no-cache-dir -r requirements.txt"
+
+
+# Debian's policy-rc.d hook: exit 101 tells maintainer scripts not to start
+# services, so mysql-server does not boot on its default config during install.
+_NO_AUTOSTART = """cat <<'EOF' >/usr/sbin/policy-rc.d
+#!/bin/sh
+exit 101
+EOF
+chmod +x /usr/sbin/policy-rc.d"""
+
+
+# Kernel network tuning for the Gatekeeper -> Proxy -> MySQL request chain:
+# fair queueing, no slow-start restart on idle keep-alive connections,
+# a deeper accept backlog and larger socket buffers.
+_NET_TUNING = """cat <<'EOF' >/etc/sysctl.d/99-log8415e.conf
+net.core.default_qdisc = fq
+net.ipv4.tcp_slow_start_after_idle = 0
+net.core.somaxconn = 4096
+net.core.rmem_max = 16777216
+net.core.wmem_max = 16777216
+EOF
+sysctl --system > /dev/null"""
+
+
+_SYSTEMD_UNIT_TMPL = Template("""cat <<'EOF' >/etc/systemd/system/${name}.service
+[Unit]
+Description=${description}
+Wants=network-online.target
+After=network-online.target
+
+[Service]
+WorkingDirectory=${remote_project_path}
+${env_lines}
+ExecStart=/usr/bin/python3 -m ${command}
+Restart=on-failure
+RestartSec=2
+TimeoutStartSec=300
+StandardOutput=append:/var/log/${name}.log
+StandardError=append:/var/log/${name}.log
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+systemctl daemon-reload
+systemctl enable ${name}.service
+systemctl start --no-block ${name}.service""")
+
+
+def _systemd_service(
+    cfg,
+    name: str,
+    description: str,
+    module: str,
+    env: Dict[str, str],
+    args: str = "",
+) -> str:
+    """
+    Bash snippet that installs and starts a systemd unit running
+    `python3 -m <module> <args>` from the repo checkout. systemd restarts the
+    app on failure and on reboot.
     """
-    return f"""#!/bin/bash
+    env_lines = "\n".join(f'Environment="{k}={v}"' for k, v in env.items())
+    return _SYSTEMD_UNIT_TMPL.substitute(
+        name=name,
+        description=description,
+        remote_project_path=cfg.remote_project_path,
+        env_lines=env_lines,
+        command=f"{module} {args}".rstrip(),
+    )
+
+
+_MANAGER_TMPL = Template("""#!/bin/bash
 set -xe
 exec > /var/log/mysql-manager-user-data.log 2>&1
+export DEBIAN_FRONTEND=noninteractive
+
+echo "=== [MANAGER] Writing MySQL config drop-in (bind-address + replication master) ==="
+# Written before the package is installed, so the very first start of MySQL
+# already uses the final config and it never needs a restart.
+# bind-address = 0.0.0.0 so other instances in the VPC can connect.
+mkdir -p /etc/mysql/mysql.conf.d
+cat <<EOF >/etc/mysql/mysql.conf.d/99-log8415e.cnf
+[mysqld]
+bind-address    = 0.0.0.0
+
+# LOG8415E replication master
+server-id       = 1
+log_bin         = /var/log/mysql/mysql-bin.log
+binlog_do_db    = sakila
+EOF
 
-echo "=== [MANAGER] Updating system and installing MySQL + tools ==="
-apt-get update -y
-apt-get install -y mysql-server sysbench git wget unzip
+echo "=== [MANAGER] Updating system and installing MySQL + tools (no auto-start) ==="
+${no_autostart}
+${install_packages}
+rm -f /usr/sbin/policy-rc.d
 
-echo "=== [MANAGER] Enabling and starting MySQL ==="
+echo "=== [MANAGER] Enabling and starting MySQL with the final config ==="
 systemctl enable mysql
-systemctl start mysql
+systemctl restart mysql
+
+echo "=== [MANAGER] Waiting for MySQL to be up ==="
+# A single mysqladmin process retries the connection itself
+mysqladmin ping -h 127.0.0.1 --wait=30 --connect-timeout=5 --silent || echo "MySQL still not answering (continuing)."
 
 echo "=== [MANAGER] Setting root password (localhost) ==="
 # Don't fail the whole script if this ALTER fails (plugin/auth differences)
-mysql -e "ALTER USER 'root'@'localhost' IDENTIFIED BY '{config.MYSQL_ROOT_PASSWORD}';" || true
+mysql -e "ALTER USER 'root'@'localhost' IDENTIFIED BY '${mysql_root_password}';" || true
 
 cat <<EOF >/root/.my.cnf
 [client]
 user=root
-password={config.MYSQL_ROOT_PASSWORD}
+password=${mysql_root_password}
 EOF
 chmod 600 /root/.my.cnf
 
-echo "=== [MANAGER] Binding MySQL to 0.0.0.0 ==="
-# Default Ubuntu conf usually has: bind-address = 127.0.0.1
-# We switch it to 0.0.0.0 so other instances in the VPC can connect.
-if grep -q "^bind-address" /etc/mysql/mysql.conf.d/mysqld.cnf; then
-  sed -i "s/^bind-address.*/bind-address = 0.0.0.0/" /etc/mysql/mysql.conf.d/mysqld.cnf
-else
-  echo "bind-address = 0.0.0.0" >> /etc/mysql/mysql.conf.d/mysqld.cnf
-fi
-
-echo "=== [MANAGER] Restarting MySQL after bind-address change ==="
-systemctl restart mysql
-
-echo "=== [MANAGER] Waiting for MySQL to be up (after bind-address) ==="
-for i in {{1..30}}; do
-  if mysqladmin ping -h 127.0.0.1 --silent; then
-    echo "MySQL is up (phase 1)."
-    break
-  fi
-  echo "MySQL not ready yet (phase 1), retrying in 5s..."
-  sleep 5
-done
-
 echo "=== [MANAGER] Creating replication and Sakila/Proxy users (with remote access) ==="
-# Clean up any existing users so we know exactly what we have
-mysql -e "DROP USER IF EXISTS '{config.MYSQL_REPL_USER}'@'%';"
-mysql -e "DROP USER IF EXISTS '{config.MYSQL_SAKILA_USER}'@'%';"
-mysql -e "DROP USER IF EXISTS 'root'@'%';"
+# One client session over the local UNIX socket runs every statement
+mysql --protocol=socket <<'SQL'
+-- Clean up any existing users so we know exactly what we have
+DROP USER IF EXISTS '${mysql_repl_user}'@'%';
+DROP USER IF EXISTS '${mysql_sakila_user}'@'%';
+DROP USER IF EXISTS 'root'@'%';
 
-# Replication user
-mysql -e "CREATE USER '{config.MYSQL_REPL_USER}'@'%' IDENTIFIED BY '{config.MYSQL_REPL_PASSWORD}';"
-mysql -e "GRANT REPLICATION SLAVE ON *.* TO '{config.MYSQL_REPL_USER}'@'%';"
+-- Replication user
+CREATE USER '${mysql_repl_user}'@'%' IDENTIFIED BY '${mysql_repl_password}';
+GRANT REPLICATION SLAVE ON *.* TO '${mysql_repl_user}'@'%';
 
-# Sakila / Proxy user (used by the proxy app)
-mysql -e "CREATE USER '{config.MYSQL_SAKILA_USER}'@'%' IDENTIFIED BY '{config.MYSQL_SAKILA_PASSWORD}';"
-mysql -e "GRANT ALL PRIVILEGES ON *.* TO '{config.MYSQL_SAKILA_USER}'@'%' WITH GRANT OPTION;"
+-- Sakila / Proxy user (used by the proxy app)
+CREATE USER '${mysql_sakila_user}'@'%' IDENTIFIED BY '${mysql_sakila_password}';
+GRANT ALL PRIVILEGES ON *.* TO '${mysql_sakila_user}'@'%' WITH GRANT OPTION;
 
-# root from any host (what proxy is using now)
-mysql -e "CREATE USER 'root'@'%' IDENTIFIED BY '{config.MYSQL_ROOT_PASSWORD}';"
-mysql -e "GRANT ALL PRIVILEGES ON *.* TO 'root'@'%' WITH GRANT OPTION;"
+-- root from any host (what proxy is using now)
+CREATE USER 'root'@'%' IDENTIFIED BY '${mysql_root_password}';
+GRANT ALL PRIVILEGES ON *.* TO 'root'@'%' WITH GRANT OPTION;
 
-mysql -e "FLUSH PRIVILEGES;"
+FLUSH PRIVILEGES;
+SQL
 
 echo "=== [MANAGER] Downloading and installing Sakila database ==="
 cd /tmp
 wget https://downloads.mysql.com/docs/sakila-db.tar.gz
 tar xzf sakila-db.tar.gz
 cd sakila-db
-mysql -e "SOURCE sakila-schema.sql;"
-mysql sakila < sakila-data.sql
-
-echo '=== [MANAGER] Configuring MySQL as replication master ==='
-cat <<EOF >> /etc/mysql/mysql.conf.d/mysqld.cnf
-
-# LOG8415E replication master
-server-id       = 1
-log_bin         = /var/log/mysql/mysql-bin.log
-binlog_do_db    = sakila
-EOF
-
-echo "=== [MANAGER] Restarting MySQL after replication config ==="
-systemctl restart mysql
-
-echo "=== [MANAGER] Waiting for MySQL to be up (final) ==="
-for i in {{1..30}}; do
-  if mysqladmin ping -h 127.0.0.1 --silent; then
-    echo "MySQL is up (final)."
-    break
-  fi
-  echo "MySQL not ready yet (final), retrying in 5s..."
-  sleep 5
-done
+# Binary logging is already on; keep the initial load out of the binlog since
+# every worker loads its own copy of Sakila.
+# Redo-log flushing is relaxed for this one-shot bulk load and restored after.
+mysql -e "SET GLOBAL innodb_flush_log_at_trx_commit = 0;"
+mysql --init-command="SET SESSION sql_log_bin = 0" -e "SOURCE sakila-schema.sql;"
+mysql --init-command="SET SESSION sql_log_bin = 0" sakila < sakila-data.sql
+mysql -e "SET GLOBAL innodb_flush_log_at_trx_commit = 1;"
 
 echo "=== [MANAGER] Manager user-data complete ==="
-"""
+""")
 
 
-def render_mysql_worker_user_data(server_id: int, manager_private_ip: str) -> str:
+@lru_cache(maxsize=None)
+def render_mysql_manager_user_data() -> str:
     """
-    User-data script for a MySQL worker (replica).
-    - Installs MySQL
-    - Configures as replication slave
-    - Creates the same DB users as the manager (sakila/proxy + root@'%')
-    - Connects to manager
-    - Binds to 0.0.0.0 so proxy can reach it
+    User-data script for the MySQL manager instance.
+    - Installs MySQL + sysbench
+    - Loads Sakila
+    - Configures as replication master and allows remote connections
+      (bind-address = 0.0.0.0) via a conf.d drop-in written before MySQL first starts
+    - Creates users for replication and Sakila access from other hosts
+    - Ensures MySQL is actually running and listening
     """
-    return f"""#!/bin/bash
+    cfg = get_config()
+    return _MANAGER_TMPL.substitute(
+        install_packages=_install_packages("mysql-server sysbench git wget unzip"),
+        no_autostart=_NO_AUTOSTART,
+        mysql_root_password=cfg.mysql_root_password,
+        mysql_repl_user=cfg.mysql_repl_user,
+        mysql_sakila_user=cfg.mysql_sakila_user,
+        mysql_repl_password=cfg.mysql_repl_password,
+        mysql_sakila_password=cfg.mysql_sakila_password,
+    )
+
+
+_WORKER_TMPL = Template("""#!/bin/bash
 set -xe
-exec > /var/log/mysql-worker-{server_id}-user-data.log 2>&1
+${server_id_setup}exec > /var/log/mysql-worker-${server_id}-user-data.log 2>&1
+export DEBIAN_FRONTEND=noninteractive
+
+echo "=== [WORKER ${server_id}] Configuring replication + bind-address ==="
+# Written before the package is installed so MySQL starts once with it.
+mkdir -p /etc/mysql/mysql.conf.d
+cat <<EOF >/etc/mysql/mysql.conf.d/99-log8415e.cnf
+[mysqld]
+# LOG8415E replication slave
+server-id = ${server_id}
+relay-log = /var/log/mysql/mysql-relay-bin.log
+binlog_do_db = sakila
+bind-address = 0.0.0.0
+EOF
 
-echo "=== [WORKER {server_id}] Updating system and installing MySQL ==="
-apt-get update -y
-apt-get install -y mysql-server git
+echo "=== [WORKER ${server_id}] Updating system and installing MySQL (no auto-start) ==="
+${no_autostart}
+${install_packages}
+rm -f /usr/sbin/policy-rc.d
 
-echo "=== [WORKER {server_id}] Enabling MySQL ==="
+echo "=== [WORKER ${server_id}] Enabling and starting MySQL ==="
 systemctl enable mysql
-systemctl start mysql
+systemctl restart mysql
 
-echo "=== [WORKER {server_id}] Setting root password (localhost) ==="
-mysql -e "ALTER USER 'root'@'localhost' IDENTIFIED BY '{config.MYSQL_ROOT_PASSWORD}';" || true
+echo "=== [WORKER ${server_id}] Setting root password (localhost) ==="
+mysql -e "ALTER USER 'root'@'localhost' IDENTIFIED BY '${mysql_root_password}';" || true
 
 cat <<EOF >/root/.my.cnf
 [client]
 user=root
-password={config.MYSQL_ROOT_PASSWORD}
+password=${mysql_root_password}
 EOF
 chmod 600 /root/.my.cnf
 
-echo "=== [WORKER {server_id}] Configuring replication + bind-address ==="
-cat <<EOF >> /etc/mysql/mysql.conf.d/mysqld.cnf
-
-# LOG8415E replication slave
-server-id = {server_id}
-relay-log = /var/log/mysql/mysql-relay-bin.log
-binlog_do_db = sakila
-bind-address = 0.0.0.0
-EOF
-
-echo "=== [WORKER {server_id}] Restarting MySQL after config ==="
-systemctl restart mysql
-
-echo "=== [WORKER {server_id}] Creating Sakila/Proxy DB users (remote access allowed) ==="
-# Clean up and recreate so it's identical to manager
-mysql -e "DROP USER IF EXISTS '{config.MYSQL_SAKILA_USER}'@'%';"
-mysql -e "DROP USER IF EXISTS 'root'@'%';"
+echo "=== [WORKER ${server_id}] Creating Sakila/Proxy DB users (remote access allowed) ==="
+# Clean up and recreate so it's identical to manager (one socket session)
+mysql --protocol=socket <<'SQL'
+DROP USER IF EXISTS '${mysql_sakila_user}'@'%';
+DROP USER IF EXISTS 'root'@'%';
 
-mysql -e "CREATE USER '{config.MYSQL_SAKILA_USER}'@'%' IDENTIFIED BY '{config.MYSQL_SAKILA_PASSWORD}';"
-mysql -e "GRANT ALL PRIVILEGES ON *.* TO '{config.MYSQL_SAKILA_USER}'@'%' WITH GRANT OPTION;"
+CREATE USER '${mysql_sakila_user}'@'%' IDENTIFIED BY '${mysql_sakila_password}';
+GRANT ALL PRIVILEGES ON *.* TO '${mysql_sakila_user}'@'%' WITH GRANT OPTION;
 
-mysql -e "CREATE USER 'root'@'%' IDENTIFIED BY '{config.MYSQL_ROOT_PASSWORD}';"
-mysql -e "GRANT ALL PRIVILEGES ON *.* TO 'root'@'%' WITH GRANT OPTION;"
+CREATE USER 'root'@'%' IDENTIFIED BY '${mysql_root_password}';
+GRANT ALL PRIVILEGES ON *.* TO 'root'@'%' WITH GRANT OPTION;
 
-mysql -e "FLUSH PRIVILEGES;"
+FLUSH PRIVILEGES;
+SQL
 
-echo "=== [WORKER {server_id}] Downloading and installing Sakila database ==="
+echo "=== [WORKER ${server_id}] Downloading and installing Sakila database ==="
 cd /tmp
 wget -q https://downloads.mysql.com/docs/sakila-db.tar.gz
 tar xzf sakila-db.tar.gz
 cd sakila-db
+# Redo-log flushing is relaxed for this one-shot bulk load and restored after.
+mysql -e "SET GLOBAL innodb_flush_log_at_trx_commit = 0;"
 mysql -e "SOURCE sakila-schema.sql;"
 mysql sakila < sakila-data.sql
-
-echo "=== [WORKER {server_id}] Configuring replication SOURCE ==="
-mysql -e "CHANGE REPLICATION SOURCE TO \\
-  SOURCE_HOST='{manager_private_ip}', \\
-  SOURCE_USER='{config.MYSQL_REPL_USER}', \\
-  SOURCE_PASSWORD='{config.MYSQL_REPL_PASSWORD}', \\
-  SOURCE_AUTO_POSITION=1;"
-
-echo "=== [WORKER {server_id}] Starting replication ==="
-mysql -e "START REPLICA;"
-
-echo "=== [WORKER {server_id}] Worker user-data complete ==="
-
-
-echo "=== [WORKER {server_id}] Worker user-data complete ==="
-"""
-
+mysql -e "SET GLOBAL innodb_flush_log_at_trx_commit = 1;"
+
+echo "=== [WORKER ${server_id}] Configuring replication SOURCE and starting replication ==="
+mysql --protocol=socket <<'SQL'
+CHANGE REPLICATION SOURCE TO
+  SOURCE_HOST='${manager_private_ip}',
+  SOURCE_USER='${mysql_repl_user}',
+  SOURCE_PASSWORD='${mysql_repl_password}',
+  SOURCE_AUTO_POSITION=1;
+START REPLICA;
+SQL
+
+echo "=== [WORKER ${server_id}] Worker user-data complete ==="
+""")
+
+
+# Shared user-data for workers launched in one RunInstances call: the
+# server-id is derived on the instance from its AMI launch index (IMDSv2).
+_SERVER_ID_FROM_LAUNCH_INDEX_TMPL = Template("""IMDS_TOKEN=$$(curl -s -X PUT http://169.254.169.254/latest/api/token -H "X-aws-ec2-metadata-token-ttl-seconds: 300")
+LAUNCH_INDEX=$$(curl -s -H "X-aws-ec2-metadata-token: $$IMDS_TOKEN" http://169.254.169.254/latest/meta-data/ami-launch-index)
+SERVER_ID=$$((${first_server_id} + LAUNCH_INDEX))
+""")
+
+
+def _render_worker(server_id: str, server_id_setup: str, manager_private_ip: str) -> str:
+    cfg = get_config()
+    return _WORKER_TMPL.substitute(
+        server_id=server_id,
+        server_id_setup=server_id_setup,
+        install_packages=_install_packages("mysql-server git"),
+        no_autostart=_NO_AUTOSTART,
+        mysql_root_password=cfg.mysql_root_password,
+        mysql_sakila_user=cfg.mysql_sakila_user,
+        mysql_sakila_password=cfg.mysql_sakila_password,
+        manager_private_ip=manager_private_ip,
+        mysql_repl_user=cfg.mysql_repl_user,
+        mysql_repl_password=cfg.mysql_repl_password,
+    )
+
+
+@lru_cache(maxsize=None)
+def render_mysql_worker_user_data(server_id: int, manager_private_ip: str) -> str:
+    """
+    User-data script for a MySQL worker (replica).
+    - Installs MySQL
+    - Configures as replication slave
+    - Creates the same DB users as the manager (sakila/proxy + root@'%')
+    - Connects to manager
+    - Binds to 0.0.0.0 so proxy can reach it
+    """
+    return _render_worker(str(server_id), "", manager_private_ip)
 
 
-def render_proxy_user_data(manager_ip: str, worker_ips: List[str]) -> str:
+@lru_cache(maxsize=None)
+def render_mysql_workers_user_data(manager_private_ip: str, first_server_id: int = 2) -> str:
     """
-    User-data for Proxy instance:
-    - Installs Python + git
-    - Clones repo
-    - Installs requirements
-    - Exports env vars for proxy app
-    - Starts proxy.app
+    Same as render_mysql_worker_user_data, but one script for all workers of a
+    batched launch (ec2_utils.create_instances): each instance uses
+    server-id = first_server_id + its AMI launch index.
     """
-    worker_ips_str = ",".join(worker_ips)
+    setup = _SERVER_ID_FROM_LAUNCH_INDEX_TMPL.substitute(first_server_id=first_server_id)
+    return _render_worker("$SERVER_ID", setup, manager_private_ip)
 
-    return f"""#!/bin/bash
+
+_PROXY_TMPL = Template("""#!/bin/bash
 # Log everything to a file so we can debug
 exec > /var/log/proxy-user-data.log 2>&1
 set -xe
+export DEBIAN_FRONTEND=noninteractive
+
+echo "=== [PROXY] Tuning kernel network settings ==="
+${net_tuning}
 
 echo "=== [PROXY] Updating system and installing Python + git + curl ==="
-apt-get update -y
-apt-get install -y python3 python3-pip git curl
+${install_packages}
 
 echo "=== [PROXY] Cloning repo ==="
 cd /home/ubuntu
 if [ ! -d "LOG8415E-final-assignement" ]; then
-  git clone {config.GIT_REPO_URL} LOG8415E-final-assignement
+  git clone ${git_repo_url} LOG8415E-final-assignement
 fi
-cd {config.REMOTE_PROJECT_PATH}
+cd ${remote_project_path}
 
 echo "=== [PROXY] Installing requirements ==="
-pip3 install -r requirements.txt
+${install_requirements}
 
-echo "=== [PROXY] Exporting env vars ==="
-export MANAGER_HOST="{manager_ip}"
-export WORKER_HOSTS="{worker_ips_str}"
-export DB_USER="root"
-export DB_PASSWORD="{config.MYSQL_ROOT_PASSWORD}"
-export DB_NAME="sakila"
-export DB_PORT="3306"
-export PROXY_STRATEGY="direct"
-export DEBUG="false"
-
-echo "=== [PROXY] Starting proxy.app on 0.0.0.0:5000 ==="
-nohup python3 -m proxy.app > /var/log/proxy.log 2>&1 &
+echo "=== [PROXY] Installing proxy.service (systemd) ==="
+${proxy_service}
 
 # small wait + simple local health check
 sleep 5
 echo "=== [PROXY] Checking if proxy is answering on localhost:5000/health ==="
 curl -sS http://localhost:5000/health || echo "Proxy health check FAILED (but continuing)."
-"""
+""")
 
 
-def render_gatekeeper_user_data(proxy_private_ip: str) -> str:
+@lru_cache(maxsize=None)
+def render_proxy_user_data(manager_ip: str, worker_ips: Tuple[str, ...]) -> str:
     """
-    User-data for Gatekeeper instance:
+    User-data for Proxy instance:
     - Installs Python + git
     - Clones repo
     - Installs requirements
-    - Exports env vars for gatekeeper app
-    - Starts gatekeeper.app (which now listens on port 80)
+    - Starts proxy.app under gunicorn as a systemd service (env vars in the unit)
+
+    worker_ips must be a tuple (not a list) so the result can be memoized.
     """
-    return f"""#!/bin/bash
+    cfg = get_config()
+    worker_ips_str = ",".join(worker_ips)
+    proxy_service = _systemd_service(
+        cfg,
+        name="proxy",
+        description="LOG8415E proxy (trusted host)",
+        module="gunicorn",
+        args="-c proxy/gunicorn_conf.py proxy.app:app",
+        env={
+            "MANAGER_HOST": manager_ip,
+            "WORKER_HOSTS": worker_ips_str,
+            "DB_USER": "root",
+            "DB_PASSWORD": cfg.mysql_root_password,
+            "DB_NAME": "sakila",
+            "DB_PORT": "3306",
+            "PROXY_STRATEGY": "direct",
+            "DEBUG": "false",
+        },
+    )
+
+    return _PROXY_TMPL.substitute(
+        net_tuning=_NET_TUNING,
+        install_packages=_install_packages("python3 python3-pip git curl"),
+        git_repo_url=cfg.git_repo_url,
+        remote_project_path=cfg.remote_project_path,
+        install_requirements=_install_requirements(),
+        proxy_service=proxy_service,
+    )
+
+
+# nginx on :80 in front of the Gatekeeper's gunicorn, which listens on a unix
+# socket; upstream connections are kept alive (HTTP/1.1, empty Connection).
+_GATEKEEPER_NGINX = """cat <<'EOF' >/etc/nginx/sites-available/gatekeeper
+upstream gatekeeper {
+    server unix:/run/gatekeeper.sock;
+    keepalive 32;
+}
+
+server {
+    listen 80 default_server;
+    keepalive_requests 10000;
+
+    location / {
+        proxy_pass http://gatekeeper;
+        proxy_http_version 1.1;
+        proxy_set_header Connection "";
+        proxy_set_header Host $host;
+        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+        # Always overwritten with the peer address, so clients can't set it
+        proxy_set_header X-Real-IP $remote_addr;
+    }
+}
+EOF
+rm -f /etc/nginx/sites-enabled/default
+ln -sf /etc/nginx/sites-available/gatekeeper /etc/nginx/sites-enabled/gatekeeper
+systemctl enable nginx
+systemctl reload-or-restart nginx"""
+
+
+_GATEKEEPER_TMPL = Template("""#!/bin/bash
 # Log script output for debugging
 exec > /var/log/gatekeeper-user-data.log 2>&1
 set -xe
+export DEBIAN_FRONTEND=noninteractive
 
-apt-get update -y
-apt-get install -y python3 python3-pip git
+${net_tuning}
+
+${install_packages}
 
 cd /home/ubuntu
 if [ ! -d "LOG8415E-final-assignement" ]; then
-  git clone {config.GIT_REPO_URL} LOG8415E-final-assignement
+  git clone ${git_repo_url} LOG8415E-final-assignement
 fi
-cd {config.REMOTE_PROJECT_PATH}
+cd ${remote_project_path}
+
+${install_requirements}
+
+${gatekeeper_service}
 
-pip3 install -r requirements.txt
+${gatekeeper_nginx}
+""")
 
-export PROXY_URL="http://{proxy_private_ip}:5000/sql"
-export API_TOKEN="supersecret123"
-export DEBUG="false"
 
-nohup python3 -m gatekeeper.app > /var/log/gatekeeper.log 2>&1 &
-"""
+@lru_cache(maxsize=None)
+def render_gatekeeper_user_data(proxy_private_ip: str) -> str:
+    """
+    User-data for Gatekeeper instance:
+    - Installs Python + git
+    - Clones repo
+    - Installs requirements
+    - Starts gatekeeper.app under gunicorn as a systemd service (unix socket)
+    - Puts nginx on port 80 in front of it
+    """
+    cfg = get_config()
+    gatekeeper_service = _systemd_service(
+        cfg,
+        name="gatekeeper",
+        description="LOG8415E gatekeeper (public entry point)",
+        module="gunicorn",
+        args="-c gatekeeper/gunicorn_conf.py gatekeeper.app:app",
+        env={
+            "PROXY_URL": f"http://{proxy_private_ip}:5000/sql",
+            "API_TOKEN": "supersecret123",
+            "DEBUG": "false",
+            "GATEKEEPER_BIND": "unix:/run/gatekeeper.sock",
+            "TRUST_X_REAL_IP": "true",
+        },
+    )
+    return _GATEKEEPER_TMPL.substitute(
+        net_tuning=_NET_TUNING,
+        install_packages=_install_packages("python3 python3-pip git nginx"),
+        git_repo_url=cfg.git_repo_url,
+        remote_project_path=cfg.remote_project_path,
+        install_requirements=_install_requirements(),
+        gatekeeper_service=gatekeeper_service,
+        gatekeeper_nginx=_GATEKEEPER_NGINX,
+    )
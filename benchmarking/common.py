@@ -0,0 +1,322 @@
+import asyncio
+import csv
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Optional
+
+import aiohttp
+import numpy as np
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+
+TOTAL_REQUESTS = 1000
+
+# Number of requests in flight at the same time (thread pool client).
+# BENCH_CONCURRENCY=1 gives the old one-request-at-a-time behaviour.
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "32"))
+
+# Must be >= CONCURRENCY so every worker thread keeps its own connection alive
+POOL_SIZE = max(64, CONCURRENCY)
+
+# Async client: max in-flight requests and max open connections
+ASYNC_CONCURRENCY = 100
+ASYNC_CONNECTION_LIMIT = 200
+
+REQUEST_TIMEOUT = 15
+
+# Untimed requests sent first on the same client, so connection setup to the
+# Gatekeeper isn't part of the measured run
+WARMUP_REQUESTS = int(os.getenv("BENCH_WARMUP", "20"))
+
+# Progress line every N completed requests (keeps print() out of the hot loop)
+PROGRESS_EVERY = 100
+
+
+class Tally:
+    """
+    Success / failure counters shared by both clients.
+    """
+
+    def __init__(self, name: str = "", size: int = TOTAL_REQUESTS):
+        self.name = name
+        self.success = 0
+        self.fail = 0
+        self.first_error = None
+        self.error_codes = Counter()
+        # Wall-clock seconds of the measured requests (warmup excluded)
+        self.elapsed = 0.0
+        # Per-request latencies in integer nanoseconds (successes and failures),
+        # preallocated and filled by index: no per-request list growth or boxed floats
+        self.latencies = np.empty(size, dtype=np.int64)
+
+    def record(self, ok: bool, code, error, latency_ns: int) -> None:
+        self.latencies[self.done] = latency_ns
+        if ok:
+            self.success += 1
+            return
+        self.fail += 1
+        self.error_codes[code] += 1
+        if self.first_error is None:
+            self.first_error = error
+
+    @property
+    def done(self) -> int:
+        return self.success + self.fail
+
+
+@lru_cache(maxsize=1)
+def get_session() -> requests.Session:
+    """
+    One HTTP session shared by all worker threads, so TCP connections to the
+    Gatekeeper are kept alive and reused instead of reopened per request.
+    Cached, so back-to-back in-process benchmark runs reuse the same pool.
+    """
+    session = requests.Session()
+    # No transparent retries: a failed request must count as a failure
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def send_request(session: requests.Session, url: str, body: bytes, headers: dict):
+    """
+    Send one POST of the pre-encoded JSON `body` and return
+    (ok, error_code, error_text, latency_ns).
+    """
+    start = time.perf_counter_ns()
+    try:
+        resp = session.post(url, data=body, headers=headers, timeout=REQUEST_TIMEOUT)
+    except Exception as e:
+        return False, "EXCEPTION", f"Exception: {repr(e)}", time.perf_counter_ns() - start
+
+    latency = time.perf_counter_ns() - start
+    if resp.status_code == 200:
+        return True, None, None, latency
+    return False, resp.status_code, f"Status {resp.status_code}: {resp.text}", latency
+
+
+def _log_progress(tally: Tally) -> None:
+    if tally.done % PROGRESS_EVERY == 0:
+        print(f"[DEBUG] {tally.name} completed {tally.done}/{TOTAL_REQUESTS} requests...", flush=True)
+
+
+def run_threaded(url: str, body: bytes, headers: dict, name: str = "") -> Tally:
+    """
+    Send TOTAL_REQUESTS POSTs from a thread pool sharing one pooled Session.
+    """
+    tally = Tally(name)
+    session = get_session()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        for _ in pool.map(lambda _: send_request(session, url, body, headers), range(WARMUP_REQUESTS)):
+            pass
+
+        # perf_counter is monotonic: NTP adjustments can't skew the elapsed time
+        start = time.perf_counter()
+        futures = [
+            pool.submit(send_request, session, url, body, headers)
+            for _ in range(TOTAL_REQUESTS)
+        ]
+        for future in as_completed(futures):
+            tally.record(*future.result())
+            _log_progress(tally)
+        tally.elapsed = time.perf_counter() - start
+    return tally
+
+
+async def send_request_async(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    url: str,
+    body: bytes,
+    headers: dict,
+):
+    """
+    Async version of send_request; the semaphore bounds requests in flight.
+    """
+    async with semaphore:
+        # Timed once a slot is free, so queueing behind the semaphore isn't counted
+        start = time.perf_counter_ns()
+        try:
+            async with session.post(url, data=body, headers=headers) as resp:
+                if resp.status == 200:
+                    await resp.read()
+                    return True, None, None, time.perf_counter_ns() - start
+                text = await resp.text()
+                return False, resp.status, f"Status {resp.status}: {text}", time.perf_counter_ns() - start
+        except Exception as e:
+            return False, "EXCEPTION", f"Exception: {repr(e)}", time.perf_counter_ns() - start
+
+
+async def _run_async(url: str, body: bytes, headers: dict, name: str) -> Tally:
+    tally = Tally(name)
+    semaphore = asyncio.Semaphore(ASYNC_CONCURRENCY)
+    connector = aiohttp.TCPConnector(limit=ASYNC_CONNECTION_LIMIT, keepalive_timeout=30)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        await asyncio.gather(*(
+            send_request_async(session, semaphore, url, body, headers)
+            for _ in range(WARMUP_REQUESTS)
+        ))
+
+        start = time.perf_counter()
+        tasks = [
+            send_request_async(session, semaphore, url, body, headers)
+            for _ in range(TOTAL_REQUESTS)
+        ]
+        for coro in asyncio.as_completed(tasks):
+            tally.record(*await coro)
+            _log_progress(tally)
+        tally.elapsed = time.perf_counter() - start
+    return tally
+
+
+def run_async(url: str, body: bytes, headers: dict, name: str = "") -> Tally:
+    """
+    Send TOTAL_REQUESTS POSTs concurrently from a single thread with aiohttp.
+    Each call runs its own event loop, so it is safe to call from several threads.
+    """
+    return asyncio.run(_run_async(url, body, headers, name))
+
+
+# BENCH_CLIENT env var picks the client: "async" (default) or "threads"
+CLIENTS = {
+    "async": run_async,
+    "threads": run_threaded,
+}
+
+
+def run_benchmark(
+    label: str,
+    query: str,
+    gatekeeper_url: Optional[str] = None,
+    api_token: Optional[str] = None,
+    strategy: Optional[str] = None,
+) -> dict:
+    """
+    Send TOTAL_REQUESTS copies of `query` to the Gatekeeper, print a summary
+    and return it as a dict (empty if the configuration is invalid).
+    Arguments left as None come from the GATEKEEPER_URL, API_TOKEN and
+    STRATEGY env vars, so the scripts still work with python -m.
+    """
+    gatekeeper_url = gatekeeper_url or os.getenv("GATEKEEPER_URL")
+    api_token = api_token or os.getenv("API_TOKEN", "supersecret123")
+    strategy = strategy or os.getenv("STRATEGY", "direct")
+    client = os.getenv("BENCH_CLIENT", "async")
+    # >1 sends {"queries": [query] * BENCH_BATCH_SIZE} per request (try 8/16/32/64)
+    batch_size = int(os.getenv("BENCH_BATCH_SIZE", "1"))
+
+    if not gatekeeper_url:
+        print("[ERROR] GATEKEEPER_URL env var is not set.")
+        return {}
+
+    if client not in CLIENTS:
+        print(f"[ERROR] Unknown BENCH_CLIENT '{client}' (expected one of {list(CLIENTS)}).")
+        return {}
+
+    # Each block is printed with a single call so concurrent runs don't interleave lines
+    concurrency = CONCURRENCY if client == "threads" else ASYNC_CONCURRENCY
+    print(
+        f"=== {label} benchmark ===\n"
+        f"Strategy        : {strategy}\n"
+        f"Gatekeeper URL  : {gatekeeper_url}\n"
+        f"Using API_TOKEN : {api_token}\n"
+        f"Client          : {client}\n"
+        f"Concurrency     : {concurrency}\n"
+        f"Warmup requests : {WARMUP_REQUESTS}\n"
+        f"Batch size      : {batch_size}"
+    )
+
+    if batch_size > 1:
+        payload = {"queries": [query] * batch_size, "strategy": strategy}
+    else:
+        payload = {"query": query, "strategy": strategy}
+    # The body is identical for every request: encode it once, send raw bytes
+    body = orjson.dumps(payload)
+
+    headers = {
+        "Content-Type": "application/json",
+        "X-API-TOKEN": api_token,
+    }
+
+    tally = CLIENTS[client](gatekeeper_url, body, headers, f"{label}/{strategy}")
+    elapsed = tally.elapsed
+    throughput = TOTAL_REQUESTS / elapsed if elapsed > 0 else 0.0
+    query_throughput = throughput * batch_size
+    latencies = tally.latencies[:tally.done]
+    if latencies.size:
+        # Converted from ns to seconds once per statistic, not per request
+        avg_latency = float(latencies.mean()) / 1e9
+        p50_latency, p95_latency, p99_latency = (
+            float(v) / 1e9 for v in np.percentile(latencies, [50, 95, 99])
+        )
+    else:
+        avg_latency = p50_latency = p95_latency = p99_latency = 0.0
+
+    lines = [
+        f"\n=== {label} benchmark result ({strategy}) ===",
+        f"Total requests: {TOTAL_REQUESTS}",
+        f"Success      : {tally.success}",
+        f"Fail         : {tally.fail}",
+        f"Time         : {elapsed:.2f}s",
+        f"Throughput   : {throughput:.2f} req/s",
+        f"Avg latency  : {avg_latency * 1000:.2f} ms",
+        f"p50/p95/p99  : {p50_latency * 1000:.2f} / {p95_latency * 1000:.2f} / {p99_latency * 1000:.2f} ms",
+    ]
+    if batch_size > 1:
+        lines.append(f"Query rate   : {query_throughput:.2f} queries/s")
+
+    if tally.error_codes:
+        lines.append("\n=== Error status code distribution ===")
+        for code, count in tally.error_codes.items():
+            lines.append(f"  {code}: {count} times")
+
+    if tally.first_error:
+        lines.append("\n*** Example error from first failed request ***")
+        lines.append(tally.first_error)
+
+    print("\n".join(lines))
+
+    return {
+        "label": label,
+        "strategy": strategy,
+        "client": client,
+        "batch_size": batch_size,
+        "total": TOTAL_REQUESTS,
+        "success": tally.success,
+        "fail": tally.fail,
+        "elapsed": elapsed,
+        "throughput": throughput,
+        "avg_latency": avg_latency,
+        "p50_latency": p50_latency,
+        "p95_latency": p95_latency,
+        "p99_latency": p99_latency,
+        "latencies_ns": latencies,
+        "error_codes": dict(tally.error_codes),
+        "first_error": tally.first_error,
+    }
+
+
+# Columns written by save_results_csv, in order
+CSV_FIELDS = (
+    "label", "strategy", "client", "batch_size", "total", "success", "fail",
+    "elapsed", "throughput", "avg_latency", "p50_latency", "p95_latency", "p99_latency",
+)
+
+
+def save_results_csv(results, path: str = "benchmark_results.csv") -> None:
+    """
+    Write run_benchmark result dicts to `path`, one row per run.
+    Empty results (invalid configuration) are skipped.
+    """
+    with open(path, "w", newline="", buffering=1 << 16) as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDS)
+        writer.writerows([res[k] for k in CSV_FIELDS] for res in results if res)
+    print(f"[INFO] Benchmark results written to {path}")
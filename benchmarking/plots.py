@@ -0,0 +1,48 @@
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# (result key, y-axis label, scale, output file) for each chart
+CHARTS = (
+    ("throughput", "Throughput (req/s)", 1.0, "throughput.png"),
+    ("avg_latency", "Average latency (ms)", 1000.0, "avg_latency.png"),
+    ("p95_latency", "p95 latency (ms)", 1000.0, "p95_latency.png"),
+)
+
+
+def plot_results(results, out_prefix: str = "benchmark_") -> None:
+    """
+    Grouped bar charts (one group per strategy, one bar per READ/WRITE) of the
+    run_benchmark result dicts. One Agg Figure is built and reused for every
+    chart, without going through pyplot or probing a GUI backend.
+    """
+    results = [res for res in results if res]
+    if not results:
+        return
+
+    strategies = list(dict.fromkeys(res["strategy"] for res in results))
+    labels = list(dict.fromkeys(res["label"] for res in results))
+    by_key = {(res["strategy"], res["label"]): res for res in results}
+    width = 0.8 / len(labels)
+
+    fig = Figure(figsize=(7, 4))
+    canvas = FigureCanvasAgg(fig)
+
+    for key, ylabel, scale, filename in CHARTS:
+        fig.clear()
+        ax = fig.add_subplot()
+        for i, label in enumerate(labels):
+            xs = [s + i * width for s in range(len(strategies))]
+            ys = [
+                by_key[(strategy, label)][key] * scale if (strategy, label) in by_key else 0.0
+                for strategy in strategies
+            ]
+            ax.bar(xs, ys, width, label=label)
+        ax.set_xticks([s + width * (len(labels) - 1) / 2 for s in range(len(strategies))])
+        ax.set_xticklabels(strategies)
+        ax.set_ylabel(ylabel)
+        ax.legend()
+        fig.tight_layout()
+
+        path = out_prefix + filename
+        canvas.print_figure(path)
+        print(f"[INFO] Chart written to {path}")
@@ -11,13 +11,12 @@ Full automation script:
 
 import os
 import time
-import subprocess
-import sys
 import argparse
-import boto3
+from concurrent.futures import ThreadPoolExecutor
 
 
 import requests
+from requests.adapters import HTTPAdapter
 from botocore.exceptions import ClientError
 
 from dotenv import load_dotenv
@@ -39,101 +38,133 @@ if missing:
 from aws import config as aws_config
 from aws import ec2_utils
 from aws import user_data
+from benchmarking import run_reads, run_writes
+from benchmarking.common import save_results_csv
+from benchmarking.plots import plot_results
+
+
+# Keep-alive session for every HTTP call this script makes to the Gatekeeper
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=0))
 
 
 def wait_for_gatekeeper_http(base_url: str, timeout: int = 300) -> None:
     """
     Poll /health on the gatekeeper until it responds 200 OK or timeout.
     base_url should be like http://<public-ip>
+    Probes back off exponentially (0.25s -> 5s) over one keep-alive session.
     """
     url = base_url.rstrip("/") + "/health"
-    start = time.time()
-    while time.time() - start < timeout:
+    deadline = time.monotonic() + timeout
+    delay = 0.25
+
+    while time.monotonic() < deadline:
         try:
             print(f"[INFO] Checking Gatekeeper health at {url} ...")
-            resp = requests.get(url, timeout=5)
+            resp = _SESSION.get(url, timeout=2)
             if resp.status_code == 200:
                 print("[INFO] Gatekeeper is healthy and responding.")
                 return
             else:
                 print(f"[DEBUG] Non-200 response: {resp.status_code} {resp.text}")
-        except Exception as e:
+        except requests.RequestException as e:
             print(f"[DEBUG] Health check failed: {e}")
-        print("[INFO] Gatekeeper not ready yet, waiting 5s...")
-        time.sleep(5)
+        print(f"[INFO] Gatekeeper not ready yet, waiting {delay:.2f}s...")
+        time.sleep(delay)
+        delay = min(delay * 1.7, 5.0)
 
     raise RuntimeError("Timed out waiting for Gatekeeper HTTP /health")
 
 
-def run_benchmarks(gatekeeper_url: str) -> None:
+def run_benchmarks(gatekeeper_url: str) -> list:
     """
-    Run 1000 READ and 1000 WRITE requests for each strategy
-    by calling the benchmarking scripts via python -m.
+    Run 1000 READ and 1000 WRITE requests for each strategy by calling the
+    benchmarking scripts' main() in-process, and return their result dicts.
     gatekeeper_url should be 'http://<public-ip>/sql'
+
+    The READ benchmarks of all strategies run concurrently (they only read);
+    WRITE benchmarks mutate the same rows, so they stay one strategy at a time.
     """
     strategies = ["direct", "random", "custom"]
 
+    with ThreadPoolExecutor(max_workers=len(strategies)) as pool:
+        futures = [
+            pool.submit(run_reads.main, gatekeeper_url, API_TOKEN, strategy)
+            for strategy in strategies
+        ]
+        results = [future.result() for future in futures]
+
     for strategy in strategies:
         print("\n" + "=" * 70)
-        print(f"[BENCHMARK] Strategy = {strategy} (READS)")
+        print(f"[BENCHMARK] Strategy = {strategy} (WRITES)")
         print("=" * 70)
+        results.append(run_writes.main(gatekeeper_url, API_TOKEN, strategy))
 
-        env = os.environ.copy()
-        env["GATEKEEPER_URL"] = gatekeeper_url
-        env["API_TOKEN"] = API_TOKEN
-        env["STRATEGY"] = strategy
-
-        # READ benchmark
-        subprocess.run(
-            [sys.executable, "-m", "benchmarking.run_reads"],
-            env=env,
-            check=False,
-        )
+    print("\n=== Benchmark summary ===")
+    for res in results:
+        if res:
+            print(
+                f"  {res['label']:<5} {res['strategy']:<7} "
+                f"{res['throughput']:8.2f} req/s  ({res['success']}/{res['total']} ok)"
+            )
+    save_results_csv(results)
+    plot_results(results)
+    return results
 
 
-        print("\n" + "=" * 70)
-        print(f"[BENCHMARK] Strategy = {strategy} (WRITES)")
-        print("=" * 70)
+def _has_mysql_self_rule(group: dict, sg_id: str) -> bool:
+    """
+    True if the SG already allows TCP 3306 from itself.
+    """
+    for perm in group.get("IpPermissions", []):
+        if perm.get("IpProtocol") not in ("tcp", "-1"):
+            continue
+        if perm.get("IpProtocol") == "tcp" and not (
+            perm.get("FromPort", 0) <= 3306 <= perm.get("ToPort", -1)
+        ):
+            continue
+        if any(pair.get("GroupId") == sg_id for pair in perm.get("UserIdGroupPairs", [])):
+            return True
+    return False
 
-        # WRITE benchmark
-        subprocess.run(
-            [sys.executable, "-m", "benchmarking.run_writes"],
-            env=env,
-            check=False,
-        )
 
 def ensure_mysql_port_open():
     """
     Ensure that the security group used by all instances allows MySQL (3306)
     traffic between instances that share the same SG.
+    The SG is described first, so re-runs don't issue a failing authorize call.
     """
     print("\n=== Ensuring security group allows MySQL (3306) between instances ===")
-    ec2 = boto3.client("ec2", region_name=aws_config.REGION)
+    ec2 = ec2_utils.get_ec2_client()
+    sg_id = aws_config.SECURITY_GROUP_ID
 
     try:
+        groups = ec2.describe_security_groups(GroupIds=[sg_id])["SecurityGroups"]
+        if groups and _has_mysql_self_rule(groups[0], sg_id):
+            print(f"[INFO] Port 3306 rule already exists on SG {sg_id}.")
+            return
+
         ec2.authorize_security_group_ingress(
-            GroupId=aws_config.SECURITY_GROUP_ID,
+            GroupId=sg_id,
             IpPermissions=[
                 {
                     "IpProtocol": "tcp",
                     "FromPort": 3306,
                     "ToPort": 3306,
                     "UserIdGroupPairs": [
-                        {"GroupId": aws_config.SECURITY_GROUP_ID}
+                        {"GroupId": sg_id}
                     ],
                 }
             ],
         )
-        print(f"[INFO] Opened port 3306 within SG {aws_config.SECURITY_GROUP_ID}.")
+        print(f"[INFO] Opened port 3306 within SG {sg_id}.")
     except ClientError as e:
-        # If the rule already exists, AWS throws InvalidPermission.Duplicate
+        # Still possible if another run added the rule in the meantime
         code = e.response.get("Error", {}).get("Code", "")
         if code == "InvalidPermission.Duplicate":
-            print(f"[INFO] Port 3306 rule already exists on SG {aws_config.SECURITY_GROUP_ID}.")
+            print(f"[INFO] Port 3306 rule already exists on SG {sg_id}.")
         else:
-            print(f"[WARN] Could not modify SG {aws_config.SECURITY_GROUP_ID}: {e}")
-
-
+            print(f"[WARN] Could not modify SG {sg_id}: {e}")
 
 
 def main():
@@ -143,54 +174,48 @@ def main():
     print(f"[INFO] Key pair      : {aws_config.KEY_NAME}")
     print(f"[INFO] Security group: {aws_config.SECURITY_GROUP_ID}")
 
-    ensure_mysql_port_open()
-    # --------------------------------------------------------------------------------
-    # 1) Launch MySQL manager
-    # --------------------------------------------------------------------------------
-    print("\n=== Step 1: Launching MySQL manager ===")
-    manager_user_data = user_data.render_mysql_manager_user_data()
-    manager_id = ec2_utils.create_instance(
-        name="mysql-manager-1",
-        role="manager",
-        instance_type=aws_config.INSTANCE_TYPE_MANAGER,
-        user_data=manager_user_data,
-    )
+    # The SG check has no dependency on the manager, so its API calls overlap
+    # with the manager launch; it only has to be done before the workers exist
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        sg_future = pool.submit(ensure_mysql_port_open)
+        # --------------------------------------------------------------------------------
+        # 1) Launch MySQL manager
+        # --------------------------------------------------------------------------------
+        print("\n=== Step 1: Launching MySQL manager ===")
+        manager_user_data = user_data.render_mysql_manager_user_data()
+        manager_id = ec2_utils.create_instance(
+            name="mysql-manager-1",
+            role="manager",
+            instance_type=aws_config.INSTANCE_TYPE_MANAGER,
+            user_data=manager_user_data,
+        )
 
-    # Wait for manager to be running and get its private IP
-    ec2_utils.wait_for_instances([manager_id])
-    manager_private_ip = ec2_utils.get_private_ip(manager_id)
-    print(f"[INFO] Manager private IP: {manager_private_ip}")
+        # Only the private IP is needed downstream, and it exists while 'pending'
+        descs = ec2_utils.wait_for_exists([manager_id])
+        manager_private_ip = descs[manager_id]["PrivateIpAddress"]
+        print(f"[INFO] Manager private IP: {manager_private_ip}")
+        sg_future.result()
 
     # --------------------------------------------------------------------------------
     # 2) Launch MySQL workers (replicas)
     # --------------------------------------------------------------------------------
     print("\n=== Step 2: Launching MySQL workers ===")
-    worker_ids = []
-    worker_private_ips = []
-
-    # Here, we create exactly 2 workers: server-id 2 and 3
-    for idx in range(2):
-        server_id = 2 + idx
-        name = f"mysql-worker-{idx + 1}"
-        print(f"[INFO] Launching {name} with server-id={server_id} ...")
-
-        worker_ud = user_data.render_mysql_worker_user_data(
-            server_id=server_id,
-            manager_private_ip=manager_private_ip,
-        )
-        wid = ec2_utils.create_instance(
-            name=name,
-            role="worker",
-            instance_type=aws_config.INSTANCE_TYPE_WORKER,
-            user_data=worker_ud,
-        )
-        worker_ids.append(wid)
-
-    ec2_utils.wait_for_instances(worker_ids)
+    # Both workers in one RunInstances call; server-id = 2 + launch index (2 and 3)
+    worker_ud = user_data.render_mysql_workers_user_data(
+        manager_private_ip=manager_private_ip,
+        first_server_id=2,
+    )
+    worker_ids = ec2_utils.create_instances(
+        name_prefix="mysql-worker",
+        role="worker",
+        instance_type=aws_config.INSTANCE_TYPE_WORKER,
+        user_data=worker_ud,
+        count=2,
+    )
 
-    for wid in worker_ids:
-        ip = ec2_utils.get_private_ip(wid)
-        worker_private_ips.append(ip)
+    descs = ec2_utils.wait_for_exists(worker_ids)
+    worker_private_ips = [descs[wid]["PrivateIpAddress"] for wid in worker_ids]
+    for wid, ip in zip(worker_ids, worker_private_ips):
         print(f"[INFO] Worker {wid} private IP: {ip}")
 
     # --------------------------------------------------------------------------------
@@ -199,7 +224,7 @@ def main():
     print("\n=== Step 3: Launching Proxy (Trusted Host) ===")
     proxy_user_data = user_data.render_proxy_user_data(
         manager_ip=manager_private_ip,
-        worker_ips=worker_private_ips,
+        worker_ips=tuple(worker_private_ips),
     )
 
     proxy_id = ec2_utils.create_instance(
@@ -209,8 +234,8 @@ def main():
         user_data=proxy_user_data,
     )
 
-    ec2_utils.wait_for_instances([proxy_id])
-    proxy_private_ip = ec2_utils.get_private_ip(proxy_id)
+    descs = ec2_utils.wait_for_exists([proxy_id])
+    proxy_private_ip = descs[proxy_id]["PrivateIpAddress"]
     print(f"[INFO] Proxy private IP: {proxy_private_ip}")
 
     # --------------------------------------------------------------------------------
@@ -228,8 +253,13 @@ def main():
         user_data=gatekeeper_user_data,
     )
 
-    ec2_utils.wait_for_instances([gatekeeper_id])
-    gatekeeper_public_ip = ec2_utils.get_public_ip(gatekeeper_id)
+    # All five instances boot in parallel; a single wait covers all of them and
+    # its DescribeInstances usually already carries the Gatekeeper's public IP.
+    # If the IP isn't assigned yet, wait for it rather than failing the run.
+    descs = ec2_utils.wait_for_instances([manager_id] + worker_ids + [proxy_id, gatekeeper_id])
+    gatekeeper_public_ip = descs[gatekeeper_id].get("PublicIpAddress")
+    if not gatekeeper_public_ip:
+        gatekeeper_public_ip = ec2_utils.wait_for_ssh(gatekeeper_id)
     if not gatekeeper_public_ip:
         raise RuntimeError("Gatekeeper does not have a public IP address.")
 
@@ -1,12 +1,16 @@
 
 import logging
+import socket
 
-from flask import Flask, request, jsonify
+from flask import Flask, request
+from flask.json.provider import DefaultJSONProvider
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 
 from . import config
 from .auth import is_authorized
-from .sql_validation import validate_sql
+from .sql_validation import is_write_sql, validate_sql
 
 # Basic logging setup
 logging.basicConfig(
@@ -14,14 +18,82 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
 )
 logger = logging.getLogger("gatekeeper")
+# Per-request access lines from the dev server; errors are still shown
+logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    orjson-backed provider, so Flask's own JSON handling (jsonify, get_json)
+    matches json_response() and read_json_body().
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+
+class _ProxyAdapter(HTTPAdapter):
+    """
+    Adapter whose new connections disable Nagle (TCP_NODELAY) and enable TCP
+    keepalive, so small request/response pairs aren't delayed and idle pooled
+    connections to the Proxy stay usable.
+    """
+
+    SOCKET_OPTIONS = [
+        (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = self.SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+
+def json_response(body, status: int = 200):
+    """
+    jsonify() replacement that encodes with orjson.
+    """
+    return app.response_class(orjson.dumps(body), status=status, mimetype="application/json")
+
+
+def read_json_body() -> dict:
+    """
+    Request body decoded with orjson; {} if it is missing, invalid or not an object.
+    """
+    try:
+        data = orjson.loads(request.get_data(cache=False) or b"{}")
+    except orjson.JSONDecodeError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def client_addr() -> str:
+    """
+    Address of the calling client. X-Forwarded-For is never used: the client
+    can set it to anything. X-Real-IP only when nginx is in front and
+    overwrites it (config.TRUST_X_REAL_IP).
+    """
+    if config.TRUST_X_REAL_IP:
+        return request.headers.get("X-Real-IP") or request.remote_addr
+    return request.remote_addr
+
+
+# One keep-alive session for all requests to the Proxy (shared by Flask threads)
+proxy_session = requests.Session()
+proxy_session.mount("http://", _ProxyAdapter(pool_connections=4, pool_maxsize=64))
 
 
 @app.route("/health", methods=["GET"])
 def health():
-    logger.info("Health check OK")
-    return jsonify({"status": "ok", "role": "gatekeeper"}), 200
+    logger.debug("Health check OK")
+    return json_response({"status": "ok", "role": "gatekeeper"}, 200)
 
 
 @app.route("/sql", methods=["POST"])
@@ -29,64 +101,109 @@ def handle_sql():
     """
     Public endpoint:
     - Checks auth (X-API-TOKEN header)
-    - Validates SQL
+    - Validates SQL (a single "query" or a batch of "queries")
     - Forwards to Proxy's /sql endpoint
     - Returns Proxy's response
     """
-    logger.info(
-        "Incoming /sql request from %s, headers=%s",
-        request.remote_addr,
-        {k: v for k, v in request.headers.items() if k.lower().startswith("x-")}
-    )
+    # Per-request logs are DEBUG only; the guard also skips building the headers dict
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug(
+            "Incoming /sql request from %s, headers=%s",
+            client_addr(),
+            {k: v for k, v in request.headers.items() if k.lower().startswith("x-")}
+        )
 
     # 1) Auth
     if not is_authorized(request):
         logger.warning("Unauthorized request rejected")
-        return jsonify({"error": "Unauthorized"}), 401
+        return json_response({"error": "Unauthorized"}, 401)
 
-    # 2) Input
-    data = request.get_json(silent=True) or {}
+    # 2) Input: a single "query" or a batch of "queries"
+    data = read_json_body()
     query = data.get("query")
+    queries = data.get("queries")
+    params = data.get("params")  # optional values for %s placeholders
     strategy = data.get("strategy")  # optional, can be None
 
-    logger.info("Received query='%s', strategy='%s'", query, strategy)
-
-    if not query:
+    if debug:
+        logger.debug(
+            "Received query='%s', queries=%s, strategy='%s'",
+            query,
+            len(queries) if isinstance(queries, list) else None,
+            strategy,
+        )
+
+    if queries is not None:
+        if not isinstance(queries, list) or not queries:
+            logger.warning("Invalid 'queries' in body")
+            return json_response({"error": "'queries' must be a non-empty list"}, 400)
+        if len(queries) > config.MAX_BATCH_QUERIES:
+            logger.warning("Batch too large: %d queries", len(queries))
+            return json_response(
+                {"error": f"At most {config.MAX_BATCH_QUERIES} queries per batch"}, 400
+            )
+        to_validate = queries
+    elif not query:
         logger.warning("Missing 'query' in body")
-        return jsonify({"error": "Missing 'query' in body"}), 400
-
-    # 3) Validate SQL
-    ok, reason = validate_sql(query)
-    if not ok:
-        logger.warning("SQL validation failed: %s", reason)
-        return jsonify({"error": "Invalid query", "reason": reason}), 400
+        return json_response({"error": "Missing 'query' in body"}, 400)
+    else:
+        to_validate = [query]
+
+    # Shape and types of "params" are checked by the Proxy
+    if params is not None and not isinstance(params, list):
+        logger.warning("Invalid 'params' in body")
+        return json_response({"error": "'params' must be a list"}, 400)
+
+    # 3) Validate SQL (every statement of a batch)
+    for q in to_validate:
+        ok, reason = validate_sql(q) if isinstance(q, str) else (False, "query must be a string")
+        if not ok:
+            logger.warning("SQL validation failed: %s", reason)
+            return json_response({"error": "Invalid query", "reason": reason}, 400)
 
     # 4) Forward to Proxy
     try:
-        payload = {"query": query}
+        payload = {"queries": queries} if queries is not None else {"query": query}
+        payload["is_write"] = any(is_write_sql(q) for q in to_validate)
+        if params is not None:
+            payload["params"] = params
         if strategy:
             payload["strategy"] = strategy
 
-        logger.info("Forwarding to proxy at %s", config.PROXY_URL)
-        resp = requests.post(config.PROXY_URL, json=payload, timeout=10)
-        logger.info("Proxy response status=%s", resp.status_code)
+        if debug:
+            logger.debug("Forwarding to proxy at %s", config.PROXY_URL)
+        resp = proxy_session.post(
+            config.PROXY_URL,
+            data=orjson.dumps(payload),
+            headers={
+                "Content-Type": "application/json",
+                # Lets the Proxy keep this client's reads on the manager right
+                # after its writes (read-your-writes)
+                "X-Client-Id": client_addr(),
+            },
+            timeout=10,
+        )
+        if debug:
+            logger.debug("Proxy response status=%s", resp.status_code)
 
         try:
-            resp_json = resp.json()
-        except Exception:
+            resp_json = orjson.loads(resp.content)
+        except orjson.JSONDecodeError:
             resp_json = {"raw_text": resp.text}
 
-        return jsonify(
+        return json_response(
             {
                 "via": "gatekeeper",
                 "proxy_status": resp.status_code,
                 "proxy_response": resp_json,
-            }
-        ), resp.status_code
+            },
+            resp.status_code,
+        )
 
     except requests.RequestException as e:
         logger.exception("Exception while contacting proxy")
-        return jsonify({"error": "Failed to reach proxy", "details": str(e)}), 502
+        return json_response({"error": "Failed to reach proxy", "details": str(e)}, 502)
 
 
 if __name__ == "__main__":
@@ -95,4 +212,5 @@ if __name__ == "__main__":
         config.PROXY_URL,
         config.DEBUG,
     )
+    # Development entry point; deployments run gunicorn (see gatekeeper/gunicorn_conf.py)
     app.run(host="0.0.0.0", port=80, debug=config.DEBUG)
@@ -14,5 +14,13 @@ PROXY_URL = _must_get("PROXY_URL")
 # Very simple shared token for auth from clients to Gatekeeper
 API_TOKEN = _must_get("API_TOKEN")  # e.g. "supersecret123"
 
+# Max number of statements accepted in one batched {"queries": [...]} request
+MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", "64"))
+
+# Set when the Gatekeeper is only reachable through nginx, which overwrites
+# X-Real-IP with the client's address. Otherwise the header is client-supplied
+# and the socket peer address is used instead.
+TRUST_X_REAL_IP = os.getenv("TRUST_X_REAL_IP", "false").lower() == "true"
+
 # Flask debug flag
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
@@ -0,0 +1,19 @@
+"""
+gunicorn settings for the Gatekeeper:
+    python3 -m gunicorn -c gatekeeper/gunicorn_conf.py gatekeeper.app:app
+Several threaded workers replace Flask's single-process dev server.
+"""
+import multiprocessing
+import os
+
+# Deployed behind nginx with GATEKEEPER_BIND=unix:/run/gatekeeper.sock
+bind = os.getenv("GATEKEEPER_BIND", "0.0.0.0:80")
+worker_class = "gthread"
+workers = int(os.getenv("GATEKEEPER_WORKERS", str(multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.getenv("GATEKEEPER_THREADS", "8"))
+# Lets benchmark clients reuse their connections between requests
+keepalive = 5
+timeout = 60
+# No access log and only warnings from gunicorn itself: nothing logged per request
+loglevel = os.getenv("GATEKEEPER_LOG_LEVEL", "warning")
+accesslog = None
@@ -1,148 +1,474 @@
+import atexit
 import logging
-import random
-
-from flask import Flask, request, jsonify
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+from flask import Flask, request
+from flask.json.provider import DefaultJSONProvider
 import mysql.connector
+import orjson
 
 from . import config
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-)
+from .connection import wait_for_db
+from .db import get_connection
+from .router import Router, is_read_query
+from .strategies.hedged import backup_worker, hedged
+from .strategies.latency_based import forget_host, record_latency
+
+# Request threads only enqueue log records; a background listener formats
+# them and does the (blocking) write to stderr
+_log_queue = queue.SimpleQueue()
+_log_stderr = logging.StreamHandler()
+_log_stderr.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"))
+_log_listener = None
+
+
+def _start_log_listener() -> None:
+    # Also run in every forked gunicorn worker: threads don't survive fork()
+    global _log_listener
+    _log_listener = QueueListener(_log_queue, _log_stderr)
+    _log_listener.start()
+
+
+# The queue handler only renders the message (and traceback); timestamp and
+# level are added by the stderr formatter
+logging.basicConfig(level=logging.INFO, format="%(message)s", handlers=[QueueHandler(_log_queue)])
+_start_log_listener()
+os.register_at_fork(after_in_child=_start_log_listener)
+atexit.register(lambda: _log_listener.stop())
 logger = logging.getLogger("proxy")
 
-app = Flask(__name__)
 
+# Dates and datetimes are handed to _json_default rather than encoded by orjson
+# as ISO 8601, so they keep Flask's RFC 822 format (http_date)
+_ORJSON_OPTS = orjson.OPT_PASSTHROUGH_DATETIME
 
-def get_connection(host: str):
-    return mysql.connector.connect(
-        host=host,
-        user=config.DB_USER,
-        password=config.DB_PASSWORD,
-        database=config.DB_NAME,
-        port=int(config.DB_PORT),
-         connection_timeout=5, 
-    )
+
+def _json_default(obj):
+    """
+    Types orjson doesn't encode itself: MySQL SET values (Python sets) become
+    lists, the rest (e.g. Decimal and DATETIME columns) go through Flask's
+    default conversion.
+    """
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return DefaultJSONProvider.default(obj)
 
 
-def choose_host(strategy: str, query: str):
+class OrjsonProvider(DefaultJSONProvider):
     """
-    Simple strategy implementation:
-    - direct: always manager
-    - random: random among manager + workers
-    - custom: reads -> random worker, writes -> manager
+    Flask JSON provider backed by orjson, used by get_json().
     """
-    manager = config.MANAGER_HOST
-    workers = config.WORKER_HOSTS
 
-    if isinstance(workers, str):
-        workers = [w for w in workers.split(",") if w.strip()]
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_json_default, option=_ORJSON_OPTS).decode()
 
-    # Fallback if no workers provided
-    all_hosts = [manager] + workers if workers else [manager]
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
-    s = (strategy or "direct").lower()
 
-    # Custom simple read/write split
-    q_lower = (query or "").strip().lower()
-    is_read = q_lower.startswith("select")
+app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
-    if s == "direct":
-        return manager
-    elif s == "random":
-        return random.choice(all_hosts)
-    elif s == "custom":
-        if is_read and workers:
-            return random.choice(workers)
-        return manager
-    else:
-        # default to manager
-        return manager
+# Picks the MySQL host per request (strategies in proxy/strategies)
+router = Router()
+
+
+def json_response(body, status: int = 200):
+    """
+    jsonify() replacement: orjson encodes straight to the response bytes.
+    """
+    return app.response_class(
+        orjson.dumps(body, default=_json_default, option=_ORJSON_OPTS),
+        status=status,
+        mimetype="application/json",
+    )
+
+
+def read_json_body() -> dict:
+    """
+    Request body decoded straight from the raw bytes with orjson, without
+    get_json()'s content-type and charset handling; {} if it is missing,
+    invalid or not an object.
+    """
+    raw = request.get_data(cache=False)
+    if not raw:
+        return {}
+    try:
+        data = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return {}
+    return data if isinstance(data, dict) else {}
 
 
 @app.route("/health", methods=["GET"])
 def health():
-    logger.info("Proxy health check OK")
-    return jsonify({"status": "ok", "role": "proxy"}), 200
+    logger.debug("Proxy health check OK")
+    return json_response({"status": "ok", "role": "proxy"}, 200)
 
-@app.route("/sql", methods=["POST"])
-def handle_sql():
-    data = request.get_json(silent=True) or {}
-    query = data.get("query")
-    strategy = data.get("strategy")
 
-    logger.info("Received /sql query='%s', strategy='%s'", query, strategy)
+def run_query(cursor, query: str, params=None):
+    """
+    Execute one query on an open cursor, binding `params` to its %s
+    placeholders if given.
+    Returns (result_dict, is_write). Reads return the column names once and
+    each row as an array, exactly as fetched: no per-row dict is built, and
+    SET values are turned into lists by the JSON encoder.
+    """
+    cursor.execute(query, params)
 
-    if not query:
-        logger.warning("Missing 'query' in body")
-        return jsonify({"error": "Missing 'query' in body"}), 400
+    if is_read_query(query):
+        rows = cursor.fetchall()
+        columns = [desc[0] for desc in cursor.description]
 
-    target_host = choose_host(strategy, query)
-    logger.info("Chosen target host=%s", target_host)
+        logger.debug("SELECT returned %d rows", len(rows))
+        return {"columns": columns, "rows": rows, "row_count": len(rows)}, False
+
+    affected = cursor.rowcount
+    logger.debug("Write query affected %d rows", affected)
+    return {"affected_rows": affected}, True
+
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def _valid_params(params_list, n_queries: int) -> bool:
+    """
+    One entry per query, each None or a list of JSON scalars.
+    """
+    return (
+        isinstance(params_list, list)
+        and len(params_list) == n_queries
+        and all(
+            p is None or (isinstance(p, list) and all(isinstance(v, _SCALARS) for v in p))
+            for p in params_list
+        )
+    )
+
+
+class DBConnectionError(Exception):
+    """
+    Could not get a connection to the target MySQL host.
+    """
+
+
+def execute_on_host(host: str, queries, params_list=None) -> list:
+    """
+    Run `queries` in order on one pooled connection to `host` and commit if
+    any of them wrote. Returns one result dict per query.
+    `params_list` holds one params list (or None) per query. When any query has
+    params, the batch runs on a prepared-statement cursor: values are bound
+    server-side over the binary protocol, and consecutive executions of the
+    same SQL reuse the statement prepared for the first one.
+    The run time of a read-only batch feeds the host's latency EWMA, used by
+    the "custom" and "hedged" strategies.
+    """
+    if params_list is None:
+        params_list = [None] * len(queries)
 
     try:
-        conn = get_connection(target_host)
+        conn = get_connection(host)
     except mysql.connector.Error as e:
-        logger.exception("MySQL connection error")
-        return jsonify({"error": "MySQL connection error", "details": str(e)}), 500
+        raise DBConnectionError(str(e)) from e
 
+    cursor = None
     try:
-        cursor = conn.cursor()
-        cursor.execute(query)
+        cursor = conn.cursor(prepared=any(p is not None for p in params_list))
+
+        start = time.perf_counter()
+        results = []
+        has_write = False
+        for q, p in zip(queries, params_list):
+            result, is_write = run_query(cursor, q, p)
+            results.append(result)
+            has_write = has_write or is_write
+
+        if has_write:
+            conn.commit()
+        else:
+            record_latency(router.state, host, (time.perf_counter() - start) * 1000)
+        return results
+
+    finally:
+        # Each is closed exactly once; close() hands the connection back to its pool
+        if cursor is not None:
+            cursor.close()
+        conn.close()
+
 
-        q_lower = query.strip().lower()
+# Bumped by every write this process runs. It is part of the coalescing and
+# result cache keys, so a read that started before a write is never shared
+# with, or served to, a read that starts after it.
+_write_epoch = 0
+_write_epoch_lock = threading.Lock()
 
-        if q_lower.startswith("select"):
-            rows = cursor.fetchall()
 
-            columns = [desc[0] for desc in cursor.description]
+def bump_write_epoch() -> None:
+    global _write_epoch
+    with _write_epoch_lock:
+        _write_epoch += 1
 
-            raw_result = [dict(zip(columns, row)) for row in rows]
 
-            # 🔧 Normalize any MySQL SET types (Python `set`) to plain lists
-            result = []
-            for row_dict in raw_result:
-                clean_row = {}
-                for k, v in row_dict.items():
-                    if isinstance(v, set):
-                        # convert SET(...) to list of strings (or ",".join(v) if you prefer)
-                        clean_row[k] = list(v)
-                    else:
-                        clean_row[k] = v
-                result.append(clean_row)
+# (write epoch, host, query, params) -> Future of the identical read currently
+# running on that host
+_inflight: Dict[Tuple, Future] = {}
+_inflight_lock = threading.Lock()
 
-            logger.info("SELECT returned %d rows", len(result))
 
-            return jsonify({
-                "rows": result,
-                "row_count": len(result),
-                "host_used": target_host,
-            }), 200
+def coalesced(key: Tuple, run):
+    """
+    Request coalescing: the first caller for `key` runs `run()`; callers
+    arriving while it is in flight wait for and share its result (or error)
+    instead of sending the same query to MySQL again.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+
+    if not leader:
+        return future.result()
+
+    try:
+        result = run()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+# Opt-in hint for the result cache (see config.RESULT_CACHE_TTL)
+CACHE_HINT_RE = re.compile(r"\s*select\s+/\*\+cache\*/", re.I)
+
+# (write epoch, query, params) -> (expiry time, results), oldest first
+_result_cache: "OrderedDict[Tuple, Tuple[float, list]]" = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+
+def is_cacheable(query: str) -> bool:
+    return config.RESULT_CACHE_TTL > 0 and (
+        CACHE_HINT_RE.match(query) is not None
+        or (bool(config.RESULT_CACHE_QUERIES) and query.strip() in config.RESULT_CACHE_QUERIES)
+    )
+
+
+def cache_get(key: Tuple) -> Optional[list]:
+    with _result_cache_lock:
+        entry = _result_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _result_cache[key]
+            return None
+        return entry[1]
+
+
+def cache_put(key: Tuple, results: list) -> None:
+    """
+    Keep `results` for RESULT_CACHE_TTL seconds, unless they are too large;
+    past RESULT_CACHE_MAX_ENTRIES the oldest entry is evicted.
+    """
+    size = len(orjson.dumps(results, default=_json_default, option=_ORJSON_OPTS))
+    if size > config.RESULT_CACHE_MAX_BYTES:
+        return
+    with _result_cache_lock:
+        _result_cache[key] = (time.monotonic() + config.RESULT_CACHE_TTL, results)
+        _result_cache.move_to_end(key)
+        if len(_result_cache) > config.RESULT_CACHE_MAX_ENTRIES:
+            _result_cache.popitem(last=False)
+
+
+# Runs the reads of the "hedged" strategy, so a request can wait on two hosts.
+# Created on the first hedged read, i.e. inside the serving worker process:
+# under gevent its threads and queue must come from the patched modules.
+_hedge_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_pool
+    if _hedge_pool is None:
+        _hedge_pool = ThreadPoolExecutor(
+            max_workers=config.HEDGE_POOL_SIZE, thread_name_prefix="hedge"
+        )
+    return _hedge_pool
+
+
+def _forget_if_unreachable(host: str):
+    """
+    Done-callback for a hedged copy: drop `host` from latency routing if it
+    failed to connect, even when the other copy has already answered.
+    """
+    def callback(future):
+        if isinstance(future.exception(), DBConnectionError):
+            forget_host(router.state, host)
+    return callback
+
+
+def execute_hedged(primary: str, backup: str, queries, params_list=None):
+    """
+    Hedged read: run on `primary`, and if it hasn't answered within
+    HEDGE_DELAY_MS (or already failed), on `backup` too. Returns
+    (host, results) of the first host to succeed; raises the last error if
+    both fail. The slower copy runs to completion and releases its own
+    connection, since a statement already sent to MySQL can't be recalled.
+    """
+    pool = _hedge_executor()
+    first = pool.submit(execute_on_host, primary, queries, params_list)
+    first.add_done_callback(_forget_if_unreachable(primary))
+    done, _ = wait([first], timeout=config.HEDGE_DELAY_MS / 1000)
+    if done and first.exception() is None:
+        return primary, first.result()
+
+    second = pool.submit(execute_on_host, backup, queries, params_list)
+    second.add_done_callback(_forget_if_unreachable(backup))
+    hosts = {second: backup}
+    if not done:
+        hosts[first] = primary
+    error = first.exception() if done else None
+
+    pending = set(hosts)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return hosts[future], future.result()
+            error = future.exception()
+    raise error
+
+
+@app.route("/sql", methods=["POST"])
+def handle_sql():
+    """
+    Body is either {"query": "..."} or, to batch several statements in one
+    round-trip, {"queries": ["...", ...]}. A batch runs on one connection and
+    is routed as a write if any of its statements is a write.
+    Optional "params" are bound to %s placeholders as a prepared statement:
+    a list of values for "query", or one list (or null) per entry of "queries".
+    """
+    data = read_json_body()
+    query = data.get("query")
+    queries = data.get("queries")
+    params = data.get("params")
+    strategy = data.get("strategy")
+    # Writes this process completes from now on bump the epoch, so this read
+    # can neither get a cached result nor join an in-flight read from before them
+    epoch = _write_epoch
+
+    # Per-request logs are DEBUG only, behind one level check
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug(
+            "Received /sql query='%s', queries=%s, strategy='%s'",
+            query,
+            len(queries) if isinstance(queries, list) else None,
+            strategy,
+        )
+
+    batched = queries is not None
+    if batched:
+        if not isinstance(queries, list) or not queries or not all(
+            isinstance(q, str) and q.strip() for q in queries
+        ):
+            logger.warning("Invalid 'queries' in body")
+            return json_response({"error": "'queries' must be a non-empty list of strings"}, 400)
+    elif not query:
+        logger.warning("Missing 'query' in body")
+        return json_response({"error": "Missing 'query' in body"}, 400)
+    else:
+        queries = [query]
+        params = None if params is None else [params]
+
+    if params is not None and not _valid_params(params, len(queries)):
+        logger.warning("Invalid 'params' in body")
+        return json_response({"error": "'params' must match the queries and hold only scalars"}, 400)
+
+    # The Gatekeeper already classified the statements; only classify here
+    # when called directly. A batch with any write is routed as a write.
+    is_write = data.get("is_write")
+    if not isinstance(is_write, bool):
+        is_write = not all(is_read_query(q) for q in queries)
+
+    # Opted-in reads are answered from the result cache while it is fresh.
+    # The cache is per worker process: writes handled by another process
+    # only show up once the entry expires.
+    cache_key = None
+    if not batched and not is_write and is_cacheable(query):
+        cache_key = (epoch, query, tuple(params[0]) if params and params[0] else None)
+        results = cache_get(cache_key)
+        if results is not None:
+            return json_response({**results[0], "host_used": "cache"}, 200)
+
+    # Reads shortly after the same client's write stay on the manager
+    target_host = router.choose_target(
+        strategy,
+        qtype="write" if is_write else "read",
+        client=request.headers.get("X-Client-Id"),
+    )
+    if debug:
+        logger.debug("Chosen target host=%s", target_host)
+
+    # A lone read is coalesced with identical reads already in flight to the
+    # same host; batches and writes always run on their own
+    coalesce = (
+        not batched and not is_write and len(query) <= config.COALESCE_MAX_QUERY_LEN
+    )
+
+    # "hedged": a slow read is re-sent to the next-fastest worker
+    backup = None
+    hedge = router.get_strategy(strategy) is hedged and not is_write
+    if hedge and target_host != router.manager_host:
+        backup = backup_worker(router.state, target_host)
+    if backup is not None:
+        run = lambda: execute_hedged(target_host, backup, queries, params)
+    else:
+        run = lambda: (target_host, execute_on_host(target_host, queries, params))
+
+    try:
+        if coalesce:
+            key = (epoch, target_host, query, tuple(params[0]) if params and params[0] else None)
+            target_host, results = coalesced(key, run)
         else:
-            affected = cursor.rowcount
-            conn.commit()
-            logger.info("Write query affected %d rows", affected)
-            return jsonify({"affected_rows": affected, "host_used": target_host}), 200
+            target_host, results = run()
+        if is_write:
+            bump_write_epoch()
+        elif cache_key is not None:
+            cache_put(cache_key, results)
+
+    # Expected DB failures: tracebacks (costly to capture) only at DEBUG
+    except DBConnectionError as e:
+        logger.error("MySQL connection error: %s", e, exc_info=debug)
+        forget_host(router.state, target_host)
+        return json_response({"error": "MySQL connection error", "details": str(e)}, 500)
 
     except mysql.connector.Error as e:
-        logger.exception("MySQL query error")
-        return jsonify({"error": "MySQL query error", "details": str(e)}), 500
+        logger.error("MySQL query error: %s", e, exc_info=debug)
+        return json_response({"error": "MySQL query error", "details": str(e)}, 500)
 
     except Exception as e:
         logger.exception("Unexpected error in proxy /sql")
-        return jsonify({"error": "Unexpected proxy error", "details": str(e)}), 500
+        return json_response({"error": "Unexpected proxy error", "details": str(e)}, 500)
 
-    finally:
-        try:
-            cursor.close()
-        except Exception:
-            pass
-        try:
-            conn.close()
-        except Exception:
-            pass
+    if batched:
+        return json_response({
+            "results": results,
+            "query_count": len(results),
+            "host_used": target_host,
+        }, 200)
 
+    return json_response({**results[0], "host_used": target_host}, 200)
 
 
 if __name__ == "__main__":
@@ -152,4 +478,6 @@ if __name__ == "__main__":
         config.WORKER_HOSTS,
         config.DEBUG,
     )
+    # Development entry point; deployments run gunicorn (see proxy/gunicorn_conf.py)
+    wait_for_db(config.MANAGER_HOST)
     app.run(host="0.0.0.0", port=5000, debug=config.DEBUG)
@@ -1,4 +1,5 @@
 import os
+import socket
 
 
 def _must_get(name: str) -> str:
@@ -8,9 +9,21 @@ def _must_get(name: str) -> str:
     return value
 
 
-# Manager + workers
-MANAGER_HOST = _must_get("MANAGER_HOST")          
-WORKER_HOSTS = _must_get("WORKER_HOSTS").split(",")  
+def _resolve(host: str) -> str:
+    """
+    Resolve `host` to an IPv4 address once, so connections and probes skip
+    getaddrinfo. IPs come back unchanged; unresolvable names are kept as-is.
+    """
+    try:
+        return socket.gethostbyname(host)
+    except OSError:
+        return host
+
+
+# Manager + workers (private IPs, or names resolved once at import)
+MANAGER_HOST = _resolve(_must_get("MANAGER_HOST"))
+# Split once at import; a tuple so it can't be changed per request
+WORKER_HOSTS = tuple(_resolve(h.strip()) for h in _must_get("WORKER_HOSTS").split(",") if h.strip())
 
 # DB credentials
 DB_USER = _must_get("DB_USER")
@@ -18,8 +31,61 @@ DB_PASSWORD = _must_get("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME", "sakila")
 DB_PORT = int(os.getenv("DB_PORT", "3306"))
 
-# Proxy strategy: "direct" | "random" | "custom"
-DEFAULT_STRATEGY = os.getenv("PROXY_STRATEGY", "direct")
+# Seconds before a MySQL connect attempt gives up
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+
+# mysql-connector protocol implementation. Pure Python is required under the
+# gevent workers (its sockets get monkey-patched); with PROXY_WORKER_CLASS=gthread
+# the faster C extension is used instead
+DB_USE_PURE = os.getenv(
+    "DB_USE_PURE",
+    "true" if os.getenv("PROXY_WORKER_CLASS", "gevent") == "gevent" else "false",
+).lower() == "true"
+
+# Pooled connections kept per MySQL host and worker process (mysql-connector
+# caps this at 32)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "16"))
+
+# Proxy strategy: "direct" | "random" | "custom" | "hedged"
+DEFAULT_STRATEGY = os.getenv("PROXY_STRATEGY", "direct").lower()
+
+# Seconds a measured worker latency table stays valid for the "custom" strategy
+LATENCY_TTL = float(os.getenv("LATENCY_TTL", "2.0"))
+
+# Weight of each new query latency in a worker's EWMA ("custom" strategy)
+LATENCY_EWMA_ALPHA = float(os.getenv("LATENCY_EWMA_ALPHA", "0.3"))
+
+# Milliseconds a read waits on its worker before the "hedged" strategy also
+# sends it to the next-fastest worker
+HEDGE_DELAY_MS = float(os.getenv("HEDGE_DELAY_MS", "50"))
+
+# Threads running hedged reads per worker process. A hedged request can hold
+# two (primary and backup), so by default every concurrent request of a gevent
+# worker (PROXY_WORKER_CONNECTIONS, as in gunicorn_conf.py) gets both at once
+HEDGE_POOL_SIZE = int(os.getenv(
+    "HEDGE_POOL_SIZE", str(2 * int(os.getenv("PROXY_WORKER_CONNECTIONS", "256")))
+))
+
+# Longest single SELECT (in characters) that is coalesced with identical
+# in-flight reads; longer statements always run on their own
+COALESCE_MAX_QUERY_LEN = int(os.getenv("COALESCE_MAX_QUERY_LEN", "1024"))
+
+# Result cache for opted-in SELECTs: those starting "SELECT /*+cache*/" or
+# listed in RESULT_CACHE_QUERIES (";"-separated). Results are kept for
+# RESULT_CACHE_TTL seconds (0 disables), at most RESULT_CACHE_MAX_ENTRIES of
+# them per worker process, and only if they encode to RESULT_CACHE_MAX_BYTES
+# or less.
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "1.0"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", "65536"))
+RESULT_CACHE_QUERIES = frozenset(
+    q.strip() for q in os.getenv("RESULT_CACHE_QUERIES", "").split(";") if q.strip()
+)
+
+# Read-your-writes: seconds a client's reads stay on the manager after its
+# write (0 disables), and how many recent writers are remembered
+RYW_WINDOW = float(os.getenv("RYW_WINDOW", "3.0"))
+RYW_MAX_CLIENTS = int(os.getenv("RYW_MAX_CLIENTS", "10000"))
 
 # Flask debug
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
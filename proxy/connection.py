@@ -0,0 +1,63 @@
+"""
+How the Proxy connects to MySQL, without any shared state: no pools, locks or
+executors are created at import. gunicorn's master runs this module's
+readiness check (see proxy/gunicorn_conf.py) without importing proxy.app or
+proxy.db, whose module-level objects must be created in the workers, after
+gevent has patched them.
+"""
+import logging
+import time
+
+import mysql.connector
+from mysql.connector import HAVE_CEXT
+
+from . import config
+
+logger = logging.getLogger("proxy.connection")
+
+
+def connect_args(host: str) -> dict:
+    """
+    mysql.connector.connect() kwargs for `host`.
+    """
+    return {
+        "host": host,
+        "user": config.DB_USER,
+        "password": config.DB_PASSWORD,
+        "database": config.DB_NAME,
+        "port": int(config.DB_PORT),
+        # Bounds connecting to a dead host (and, with the pure-Python
+        # protocol, each socket read/write) instead of waiting on TCP retries
+        "connection_timeout": config.DB_CONNECT_TIMEOUT,
+        # Pure Python under gevent (the C extension would block the event
+        # loop), C extension otherwise when installed; see config.DB_USE_PURE
+        "use_pure": config.DB_USE_PURE or not HAVE_CEXT,
+    }
+
+
+def wait_for_db(host: str, timeout: float = 300.0) -> None:
+    """
+    Block until MySQL on `host` accepts a connection, retrying with exponential
+    backoff (0.5 s doubling up to 10 s). Raises RuntimeError on timeout so
+    systemd can restart the service.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.5
+    while True:
+        try:
+            # Direct connection, not a pool: nothing is kept once MySQL answers
+            mysql.connector.connect(**connect_args(host)).close()
+            logger.info("MySQL on %s is ready", host)
+            return
+        except mysql.connector.Error as e:
+            if time.monotonic() + delay > deadline:
+                raise RuntimeError(f"MySQL on {host} not ready after {timeout}s: {e}")
+            logger.info("MySQL on %s not ready yet (%s), retrying in %.1fs", host, e, delay)
+            time.sleep(delay)
+            delay = min(delay * 2, 10.0)
+
+
+if __name__ == "__main__":
+    # python -m proxy.connection: exits non-zero if the manager never answers
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    wait_for_db(config.MANAGER_HOST)
@@ -1,53 +1,59 @@
+import logging
+from concurrent.futures import Future
+
 import mysql.connector
-from mysql.connector import Error
-from typing import Any, Tuple
+from mysql.connector import pooling
+from typing import Dict
 
 from . import config
+from .connection import connect_args
 
+logger = logging.getLogger("proxy.db")
 
-def get_connection(host: str):
+# One connection pool per MySQL host, created on first use, i.e. in the
+# serving (gunicorn worker) process and after MySQL is up
+_pools: Dict[str, "Future[pooling.MySQLConnectionPool]"] = {}
+
+
+def _get_pool(host: str) -> pooling.MySQLConnectionPool:
     """
-    Returns a new MySQL connection for the given host.
-    (You can replace this with a connection pool later if needed.)
+    The first caller for `host` builds its pool; callers arriving meanwhile
+    wait on its Future instead of opening pools of their own. No lock is held
+    while the pool's connections are opened, so under gevent other requests
+    keep running.
     """
-    return mysql.connector.connect(
-        host=host,
-        user=config.DB_USER,
-        password=config.DB_PASSWORD,
-        database=config.DB_NAME,
-        port=config.DB_PORT,
-    )
+    future = _pools.get(host)
+    if future is None:
+        # setdefault is atomic: exactly one caller gets its own Future back
+        new = Future()
+        future = _pools.setdefault(host, new)
+        if future is new:
+            try:
+                # The session reset on release is kept: without it a pooled
+                # connection would keep the read snapshot of its last SELECT
+                pool = pooling.MySQLConnectionPool(
+                    pool_name=f"proxy-{host}",
+                    pool_size=config.DB_POOL_SIZE,
+                    **connect_args(host),
+                )
+            except BaseException as e:
+                # Not cached: the next request retries
+                del _pools[host]
+                new.set_exception(e)
+                raise
+            new.set_result(pool)
+            logger.info("Created MySQL pool for %s (size=%d)", host, config.DB_POOL_SIZE)
+    return future.result()
 
 
-def execute_query(host: str, query: str) -> Tuple[Any, str]:
+def get_connection(host: str):
     """
-    Execute the given query on the given host.
-    Returns (result, message). For SELECT, result is list of rows.
-    For non-SELECT, result is affected rows count.
+    Borrow a pooled, already authenticated connection to `host`; conn.close()
+    hands it back to the pool. If every pooled connection is busy, fall back
+    to a one-off connection instead of failing the request.
     """
-    conn = None
-    cursor = None
     try:
-        conn = get_connection(host)
-        cursor = conn.cursor()
-
-        is_read = query.strip().lower().startswith(
-            ("select", "show", "describe", "explain")
-        )
-
-        cursor.execute(query)
-
-        if is_read:
-            rows = cursor.fetchall()
-            return rows, f"Executed READ on {host}"
-        else:
-            conn.commit()
-            return cursor.rowcount, f"Executed WRITE on {host}"
-
-    except Error as e:
-        return None, f"Error executing query on {host}: {e}"
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+        return _get_pool(host).get_connection()
+    except pooling.PoolError:
+        logger.warning("MySQL pool for %s exhausted, opening a direct connection", host)
+        return mysql.connector.connect(**connect_args(host))
@@ -0,0 +1,37 @@
+"""
+gunicorn settings for the Proxy:
+    python3 -m gunicorn -c proxy/gunicorn_conf.py proxy.app:app
+gevent workers keep many queries in flight at once, unlike Flask's dev server.
+The worker monkey-patches sockets and locks before loading the app, so MySQL
+reads and TCP probes yield instead of blocking the worker.
+"""
+import os
+import subprocess
+import sys
+
+bind = os.getenv("PROXY_BIND", "0.0.0.0:5000")
+# PROXY_WORKER_CLASS=gthread falls back to threads (PROXY_THREADS per worker)
+worker_class = os.getenv("PROXY_WORKER_CLASS", "gevent")
+workers = int(os.getenv("PROXY_WORKERS", "2"))
+threads = int(os.getenv("PROXY_THREADS", "16"))
+# Concurrent requests (greenlets) per gevent worker. Each one in a query holds
+# a MySQL connection: past DB_POOL_SIZE per host, one-off connections are opened
+worker_connections = int(os.getenv("PROXY_WORKER_CONNECTIONS", "256"))
+keepalive = 30
+timeout = 60
+# No access log and only warnings from gunicorn itself: nothing logged per request
+loglevel = os.getenv("PROXY_LOG_LEVEL", "warning")
+accesslog = None
+
+
+def on_starting(server):
+    # Same readiness gate as `python -m proxy.app`: don't accept traffic
+    # before the manager's MySQL answers. It runs in a child process so the
+    # master never imports mysql.connector or the app: workers fork from the
+    # master, and anything imported there keeps its unpatched locks and
+    # queues even after the gevent worker monkey-patches.
+    subprocess.run(
+        [sys.executable, "-m", "proxy.connection"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        check=True,
+    )
@@ -1,23 +1,29 @@
-from typing import Dict
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
 
 from . import config
-from .strategies.base import BaseStrategy
-from .strategies.direct import DirectStrategy
-from .strategies.random_choice import RandomChoiceStrategy
-from .strategies.latency_based import LatencyBasedStrategy
+from .strategies.base import Strategy
+from .strategies.direct import direct
+from .strategies.random import random_choice
+from .strategies.latency_based import latency_based
+from .strategies.hedged import hedged
 
 
-def classify_query(query: str) -> str:
+# Statements that return a result set. Anchored at the start, so only the
+# leading keyword is scanned, never the rest of a large statement, and
+# nothing is lowercased or split
+_READ_RE = re.compile(r"^\s*(?:select|show|describe|explain)\b", re.I)
+
+
+def is_read_query(query: str) -> bool:
     """
     Very simple READ/WRITE classifier based on first word.
+    INSERT, UPDATE, DELETE, CREATE, DROP, etc. are writes.
     """
-    first = query.strip().split(None, 1)[0].lower() if query.strip() else ""
-
-    if first in ("select", "show", "describe", "explain"):
-        return "read"
-    else:
-        # INSERT, UPDATE, DELETE, CREATE, DROP, etc.
-        return "write"
+    return _READ_RE.match(query) is not None
 
 
 class Router:
@@ -27,23 +33,70 @@ class Router:
 
         self.state: Dict = {
             "worker_latencies": {},
+            "latencies_measured_at": 0.0,
         }
 
-        self.strategies: Dict[str, BaseStrategy] = {
-            "direct": DirectStrategy(),
-            "random": RandomChoiceStrategy(),
-            "custom": LatencyBasedStrategy(),
+        # Read-your-writes: client id -> monotonic time until which its reads
+        # stay on the manager. Oldest entries are evicted past RYW_MAX_CLIENTS.
+        self._recent_writes: "OrderedDict[str, float]" = OrderedDict()
+        self._recent_writes_lock = threading.Lock()
+
+        self.strategies: Dict[str, Strategy] = {
+            "direct": direct,
+            "random": random_choice,
+            "custom": latency_based,
+            "hedged": hedged,
         }
+        # Looked up once, not on every request that names no strategy. An
+        # unknown PROXY_STRATEGY falls back to "direct" rather than failing at import.
+        self.default_strategy: Strategy = self.strategies.get(config.DEFAULT_STRATEGY, direct)
+
+    def get_strategy(self, name: Optional[str]) -> Strategy:
+        """
+        Strategy named by the request (case-insensitive), else the default one.
+        """
+        if not isinstance(name, str):
+            return self.default_strategy
+        return self.strategies.get(name.lower(), self.default_strategy)
+
+    def _pinned_to_manager(self, client: Optional[str], qtype: str) -> bool:
+        """
+        Record a write by `client`, or tell whether its read falls within
+        RYW_WINDOW seconds of its last write (a replica may not have it yet).
+        """
+        if not client or config.RYW_WINDOW <= 0:
+            return False
+
+        now = time.monotonic()
+        with self._recent_writes_lock:
+            if qtype == "write":
+                self._recent_writes[client] = now + config.RYW_WINDOW
+                self._recent_writes.move_to_end(client)
+                if len(self._recent_writes) > config.RYW_MAX_CLIENTS:
+                    self._recent_writes.popitem(last=False)
+                return False
 
-    def get_strategy(self, name: str) -> BaseStrategy:
-        return self.strategies.get(name, self.strategies[config.DEFAULT_STRATEGY])
+            deadline = self._recent_writes.get(client)
+            if deadline is None:
+                return False
+            if now < deadline:
+                return True
+            del self._recent_writes[client]
+            return False
 
-    def choose_target(self, query: str, strategy_name: str) -> str:
-        qtype = classify_query(query)
+    def choose_target(
+        self,
+        strategy_name: Optional[str],
+        qtype: str,
+        client: Optional[str] = None,
+    ) -> str:
+        """
+        `qtype` ("read" or "write") comes from the caller, which has already
+        classified the statement with is_read_query. `client` identifies the
+        caller for read-your-writes: its reads shortly after its own write go
+        to the manager whatever the strategy.
+        """
+        if self._pinned_to_manager(client, qtype):
+            return self.manager_host
         strategy = self.get_strategy(strategy_name)
-        return strategy.choose_target(
-            query_type=qtype,
-            manager_host=self.manager_host,
-            worker_hosts=self.worker_hosts,
-            state=self.state,
-        )
+        return strategy(qtype, self.manager_host, self.worker_hosts, self.state)
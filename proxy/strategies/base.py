@@ -1,25 +1,9 @@
-from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import Callable, Dict, Sequence
 
-
-class BaseStrategy(ABC):
-    """
-    Strategy interface. All strategies must implement choose_target().
-    """
-
-    @abstractmethod
-    def choose_target(
-        self,
-        query_type: str,
-        manager_host: str,
-        worker_hosts: List[str],
-        state: Dict,
-    ) -> str:
-        """
-        :param query_type: "read" or "write"
-        :param manager_host: manager node host/IP
-        :param worker_hosts: list of worker node hosts
-        :param state: shared state (e.g., ping times)
-        :return: host/IP string to send the query to
-        """
-        pass
+# A strategy is a plain function, called positionally by the Router:
+#   strategy(query_type, manager_host, worker_hosts, state) -> host
+#     query_type:   "read" or "write"
+#     manager_host: manager node host/IP
+#     worker_hosts: worker node hosts
+#     state:        shared state (e.g., worker latencies)
+Strategy = Callable[[str, str, Sequence[str], Dict], str]
@@ -1,18 +1,14 @@
-from typing import List, Dict
-from .base import BaseStrategy
+from typing import Dict, Sequence
 
 
-class DirectStrategy(BaseStrategy):
+def direct(
+    query_type: str,
+    manager_host: str,
+    worker_hosts: Sequence[str],
+    state: Dict,
+) -> str:
     """
     Direct hit: always forward to the manager node,
     regardless of READ/WRITE.
     """
-
-    def choose_target(
-        self,
-        query_type: str,
-        manager_host: str,
-        worker_hosts: List[str],
-        state: Dict,
-    ) -> str:
-        return manager_host
+    return manager_host
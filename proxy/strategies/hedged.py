@@ -0,0 +1,34 @@
+from typing import Dict, Optional, Sequence
+
+from .latency_based import refresh_latencies
+
+
+def hedged(
+    query_type: str,
+    manager_host: str,
+    worker_hosts: Sequence[str],
+    state: Dict,
+) -> str:
+    """
+    Hedged strategy:
+      - WRITE -> manager
+      - READ  -> worker with the lowest latency EWMA; if it hasn't answered
+                 within HEDGE_DELAY_MS, the Proxy also sends the read to
+                 backup_worker() and keeps whichever answers first
+    """
+    if query_type == "write" or not worker_hosts:
+        return manager_host
+
+    latencies = refresh_latencies(worker_hosts, state)
+    if not latencies:
+        return manager_host
+    return min(latencies, key=latencies.get)
+
+
+def backup_worker(state: Dict, primary: str) -> Optional[str]:
+    """
+    Second-fastest reachable worker, for the hedge of a read sent to `primary`.
+    """
+    latencies = state.get("worker_latencies", {})
+    others = [h for h in latencies if h != primary]
+    return min(others, key=latencies.get) if others else None
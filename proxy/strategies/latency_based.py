@@ -1,42 +1,127 @@
-from typing import List, Dict
-from .base import BaseStrategy
-from ..utils.ping import ping_host
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Sequence
 
+from .. import config
+from ..utils.probe import tcp_latency
 
-class LatencyBasedStrategy(BaseStrategy):
+# Serializes updates of state["worker_latencies"]. Updates build a new dict and
+# swap it in, so readers can use the current one without taking the lock.
+_latencies_lock = threading.Lock()
+
+# Held by the one caller that re-probes the workers; the others keep routing
+# on the current table meanwhile
+_probe_lock = threading.Lock()
+
+# Reused for every probe round. Created on first use, inside the worker
+# process, like the Proxy's other executors.
+_probe_pool: Optional[ThreadPoolExecutor] = None
+
+# EWMA given to newly reachable workers when no worker has query timings yet.
+# Equal seeds share reads evenly until real timings come in.
+_SEED_MS = 1.0
+
+
+def record_latency(state: Dict, host: str, latency_ms: float) -> None:
     """
-    Custom strategy:
-      - WRITE -> manager
-      - READ  -> choose worker with lowest ping
+    Fold an observed query latency into the host's EWMA. Hosts that aren't in
+    the table (the manager, unreachable workers) are ignored.
     """
+    with _latencies_lock:
+        latencies = state.get("worker_latencies", {})
+        old = latencies.get(host)
+        if old is None:
+            return
+        alpha = config.LATENCY_EWMA_ALPHA
+        state["worker_latencies"] = {**latencies, host: alpha * latency_ms + (1 - alpha) * old}
 
-    def choose_target(
-        self,
-        query_type: str,
-        manager_host: str,
-        worker_hosts: List[str],
-        state: Dict,
-    ) -> str:
-        if query_type == "write" or not worker_hosts:
-            return manager_host
 
-        # state["worker_latencies"] is a dict: {host: latency_ms}
+def forget_host(state: Dict, host: str) -> None:
+    """
+    Drop a worker that just failed to connect, so reads skip it until the next
+    probe (at most LATENCY_TTL later) finds it reachable again.
+    """
+    with _latencies_lock:
         latencies = state.get("worker_latencies", {})
+        if host in latencies:
+            state["worker_latencies"] = {h: v for h, v in latencies.items() if h != host}
+
 
-        # If we don't have latencies yet, measure them now
-        if not latencies:
-            latencies = {}
-            for w in worker_hosts:
-                latency = ping_host(w)
-                if latency is not None:
-                    latencies[w] = latency
+def refresh_latencies(worker_hosts: Sequence[str], state: Dict) -> Dict[str, float]:
+    """
+    Return state["worker_latencies"] ({host: latency_ms}), probing the
+    workers first if the table is stale.
+    """
+    global _probe_pool
+
+    # Re-probe only when the table is older than LATENCY_TTL, not on every
+    # read. Probes decide which workers are reachable; workers already in the
+    # table keep their EWMA. An empty but fresh table (no worker reachable)
+    # sends reads to the manager until the next probe.
+    latencies = state.get("worker_latencies", {})
+    measured_at = state.get("latencies_measured_at", 0.0)
+    if measured_at and time.monotonic() - measured_at <= config.LATENCY_TTL:
+        return latencies
 
+    # Only one caller probes. With a stale table the others go on with it;
+    # with none yet they wait for the probe in progress.
+    if not _probe_lock.acquire(blocking=not latencies):
+        return latencies
+    try:
+        if state.get("latencies_measured_at", 0.0) != measured_at:
+            # Another caller probed while this one waited
+            return state.get("worker_latencies", {})
+
+        if _probe_pool is None:
+            _probe_pool = ThreadPoolExecutor(
+                max_workers=max(1, len(worker_hosts)), thread_name_prefix="probe"
+            )
+        # All workers are probed at once: the wait is the slowest probe,
+        # not the sum of them
+        probed = list(_probe_pool.map(lambda w: tcp_latency(w, config.DB_PORT), worker_hosts))
+
+        with _latencies_lock:
+            current = state.get("worker_latencies", {})
+            # The EWMAs are query timings, so a TCP connect time is no seed for
+            # them: a newly reachable worker starts at the mean of the others
+            seed = sum(current.values()) / len(current) if current else _SEED_MS
+            latencies = {
+                w: current.get(w, seed)
+                for w, latency in zip(worker_hosts, probed)
+                if latency is not None
+            }
             state["worker_latencies"] = latencies
+            state["latencies_measured_at"] = time.monotonic()
+        return latencies
+    finally:
+        _probe_lock.release()
+
+
+def latency_based(
+    query_type: str,
+    manager_host: str,
+    worker_hosts: Sequence[str],
+    state: Dict,
+) -> str:
+    """
+    Custom strategy:
+      - WRITE -> manager
+      - READ  -> reachable worker, picked at random weighted by 1 / EWMA of its
+                 observed query latency (a TCP connect to MySQL tells which
+                 workers are reachable)
+    """
+    if query_type == "write" or not worker_hosts:
+        return manager_host
 
-        if not latencies:
-            # If we couldn't ping any worker, fallback to manager
-            return manager_host
+    latencies = refresh_latencies(worker_hosts, state)
+    if not latencies:
+        # If we couldn't reach any worker, fallback to manager
+        return manager_host
 
-        # Choose worker with lowest latency
-        best_worker = min(latencies, key=latencies.get)
-        return best_worker
+    # Faster workers get proportionally more reads, but a slow one is still
+    # sampled now and then, so its EWMA can recover
+    hosts = list(latencies)
+    weights = [1.0 / max(latencies[h], 0.001) for h in hosts]
+    return random.choices(hosts, weights=weights)[0]
@@ -1,23 +1,24 @@
-import random
-from typing import List, Dict
-from .base import BaseStrategy
+import itertools
+from typing import Dict, Sequence
 
+# Shared by all requests; next() on itertools.count is atomic under the GIL
+_counter = itertools.count()
 
-class RandomChoiceStrategy(BaseStrategy):
+
+def random_choice(
+    query_type: str,
+    manager_host: str,
+    worker_hosts: Sequence[str],
+    state: Dict,
+) -> str:
     """
-    Random strategy:
-      - READ  -> randomly pick a worker
+    Round-robin strategy, still named "random" on the wire:
+      - READ  -> next worker in turn
       - WRITE -> go to manager
+    A shared counter spreads reads as evenly as random.choice() would, without
+    the RNG call.
     """
+    if query_type == "write" or not worker_hosts:
+        return manager_host
 
-    def choose_target(
-        self,
-        query_type: str,
-        manager_host: str,
-        worker_hosts: List[str],
-        state: Dict,
-    ) -> str:
-        if query_type == "write" or not worker_hosts:
-            return manager_host
-
-        return random.choice(worker_hosts)
+    return worker_hosts[next(_counter) % len(worker_hosts)]
@@ -0,0 +1,16 @@
+import socket
+import time
+from typing import Optional
+
+
+def tcp_latency(host: str, port: int = 3306, timeout: float = 0.5) -> Optional[float]:
+    """
+    Time a TCP connect to host:port and return it in ms, or None if it fails.
+    Probes the MySQL port itself rather than ICMP, and forks no process.
+    """
+    start = time.perf_counter()
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return (time.perf_counter() - start) * 1000
+    except OSError:
+        return None
@@ -0,0 +1,48 @@
+import os
+import sys
+
+# proxy.config reads these at import; IPs, so nothing is resolved
+os.environ.setdefault("MANAGER_HOST", "10.0.0.1")
+os.environ.setdefault("WORKER_HOSTS", "10.0.0.2,10.0.0.3")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+from proxy import app as proxy_app  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clean_proxy_state():
+    proxy_app._result_cache.clear()
+    proxy_app._inflight.clear()
+    yield
+    proxy_app._result_cache.clear()
+    proxy_app._inflight.clear()
+
+
+@pytest.fixture
+def client():
+    return proxy_app.app.test_client()
+
+
+class FakeClock:
+    """
+    Stand-in for the `time` module of the code under test.
+    """
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
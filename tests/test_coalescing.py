@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+from proxy import app as proxy_app
+
+SLOW = "SELECT * FROM film"
+TIMEOUT = 5
+
+
+def wait_until(predicate):
+    deadline = time.monotonic() + TIMEOUT
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.005)
+
+
+def has_waiter(key) -> bool:
+    """
+    True once a follower is blocked on the in-flight Future for `key`.
+    """
+    future = proxy_app._inflight.get(key)
+    return future is not None and len(future._condition._waiters) > 0
+
+
+def test_follower_gets_leader_result():
+    key = ("k",)
+    started, release = threading.Event(), threading.Event()
+    follower_runs = []
+    results = {}
+
+    def leader_run():
+        started.set()
+        release.wait(TIMEOUT)
+        return "rows"
+
+    leader = threading.Thread(target=lambda: results.update(leader=proxy_app.coalesced(key, leader_run)))
+    leader.start()
+    started.wait(TIMEOUT)
+
+    follower = threading.Thread(
+        target=lambda: results.update(
+            follower=proxy_app.coalesced(key, lambda: follower_runs.append(1))
+        )
+    )
+    follower.start()
+    wait_until(lambda: has_waiter(key))
+    release.set()
+    leader.join(TIMEOUT)
+    follower.join(TIMEOUT)
+
+    assert results == {"leader": "rows", "follower": "rows"}
+    assert follower_runs == []
+    assert key not in proxy_app._inflight
+
+
+def test_follower_gets_leader_exception():
+    key = ("k",)
+    started, release = threading.Event(), threading.Event()
+    follower_runs = []
+    errors = {}
+
+    def leader_run():
+        started.set()
+        release.wait(TIMEOUT)
+        raise proxy_app.DBConnectionError("manager down")
+
+    def call(name, run):
+        try:
+            proxy_app.coalesced(key, run)
+        except proxy_app.DBConnectionError as e:
+            errors[name] = e
+
+    leader = threading.Thread(target=call, args=("leader", leader_run))
+    leader.start()
+    started.wait(TIMEOUT)
+
+    follower = threading.Thread(target=call, args=("follower", lambda: follower_runs.append(1)))
+    follower.start()
+    wait_until(lambda: has_waiter(key))
+    release.set()
+    leader.join(TIMEOUT)
+    follower.join(TIMEOUT)
+
+    assert errors["follower"] is errors["leader"]
+    assert follower_runs == []
+    # The failure isn't kept: the next caller runs the query again
+    assert proxy_app.coalesced(key, lambda: "retried") == "retried"
+
+
+@pytest.mark.parametrize("write_in_between", [False, True])
+def test_read_after_write_does_not_join_earlier_read(client, monkeypatch, write_in_between):
+    release = threading.Event()
+    reads = []
+
+    def execute_on_host(host, queries, params_list=None):
+        if not proxy_app.is_read_query(queries[0]):
+            return [{"affected_rows": 1}]
+        reads.append(host)
+        n = len(reads)
+        release.wait(TIMEOUT)
+        return [{"columns": ["n"], "rows": [(n,)], "row_count": 1}]
+
+    monkeypatch.setattr(proxy_app, "execute_on_host", execute_on_host)
+    bodies = {}
+
+    def read(name):
+        bodies[name] = proxy_app.app.test_client().post(
+            "/sql", json={"query": SLOW, "strategy": "direct"}
+        ).get_json()
+
+    first = threading.Thread(target=read, args=("first",))
+    first.start()
+    wait_until(lambda: len(reads) == 1)
+
+    if write_in_between:
+        client.post("/sql", json={"query": "UPDATE film SET length = 1", "strategy": "direct"})
+
+    second = threading.Thread(target=read, args=("second",))
+    second.start()
+    if write_in_between:
+        # Its own query, not the one started before the write
+        wait_until(lambda: len(reads) == 2)
+    else:
+        wait_until(lambda: any(has_waiter(k) for k in list(proxy_app._inflight)))
+    release.set()
+    first.join(TIMEOUT)
+    second.join(TIMEOUT)
+
+    assert len(reads) == (2 if write_in_between else 1)
+    assert bodies["first"]["rows"] == [[1]]
+    assert bodies["second"]["rows"] == ([[2]] if write_in_between else [[1]])
@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+
+from proxy import app as proxy_app
+from proxy import config
+
+PRIMARY, BACKUP = "10.0.0.2", "10.0.0.3"
+
+
+def wait_until(predicate, timeout=5):
+    # Done-callbacks run in the pool thread, possibly after the waiter returned
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.005)
+
+
+def test_primary_answering_in_time_is_not_hedged(monkeypatch):
+    calls = []
+
+    def execute_on_host(host, queries, params_list=None):
+        calls.append(host)
+        return [{"host": host}]
+
+    monkeypatch.setattr(proxy_app, "execute_on_host", execute_on_host)
+    monkeypatch.setattr(config, "HEDGE_DELAY_MS", 1000)
+
+    assert proxy_app.execute_hedged(PRIMARY, BACKUP, ["SELECT 1"]) == (PRIMARY, [{"host": PRIMARY}])
+    assert calls == [PRIMARY]
+
+
+def test_failed_primary_falls_back_to_backup_without_waiting(monkeypatch):
+    def execute_on_host(host, queries, params_list=None):
+        if host == PRIMARY:
+            raise proxy_app.DBConnectionError("primary down")
+        return [{"host": host}]
+
+    monkeypatch.setattr(proxy_app, "execute_on_host", execute_on_host)
+    # Far longer than the test: the fallback must not wait for the hedge delay
+    monkeypatch.setattr(config, "HEDGE_DELAY_MS", 10_000)
+
+    start = time.monotonic()
+    assert proxy_app.execute_hedged(PRIMARY, BACKUP, ["SELECT 1"]) == (BACKUP, [{"host": BACKUP}])
+    assert time.monotonic() - start < 5
+
+
+def test_slow_primary_is_hedged_to_backup(monkeypatch):
+    release = threading.Event()
+
+    def execute_on_host(host, queries, params_list=None):
+        if host == PRIMARY:
+            release.wait(5)
+        return [{"host": host}]
+
+    monkeypatch.setattr(proxy_app, "execute_on_host", execute_on_host)
+    monkeypatch.setattr(config, "HEDGE_DELAY_MS", 10)
+
+    try:
+        assert proxy_app.execute_hedged(PRIMARY, BACKUP, ["SELECT 1"]) == (BACKUP, [{"host": BACKUP}])
+    finally:
+        release.set()
+
+
+def test_both_failing_raises_last_error(monkeypatch):
+    def execute_on_host(host, queries, params_list=None):
+        raise proxy_app.DBConnectionError(f"{host} down")
+
+    monkeypatch.setattr(proxy_app, "execute_on_host", execute_on_host)
+    monkeypatch.setattr(config, "HEDGE_DELAY_MS", 10)
+
+    with pytest.raises(proxy_app.DBConnectionError, match=BACKUP):
+        proxy_app.execute_hedged(PRIMARY, BACKUP, ["SELECT 1"])
+
+
+def test_unreachable_hosts_are_forgotten(monkeypatch):
+    def execute_on_host(host, queries, params_list=None):
+        if host == PRIMARY:
+            raise proxy_app.DBConnectionError("primary down")
+        return [{"host": host}]
+
+    monkeypatch.setattr(proxy_app, "execute_on_host", execute_on_host)
+    monkeypatch.setattr(config, "HEDGE_DELAY_MS", 10)
+    monkeypatch.setitem(proxy_app.router.state, "worker_latencies", {PRIMARY: 1.0, BACKUP: 2.0})
+
+    assert proxy_app.execute_hedged(PRIMARY, BACKUP, ["SELECT 1"]) == (BACKUP, [{"host": BACKUP}])
+    wait_until(lambda: proxy_app.router.state["worker_latencies"] == {BACKUP: 2.0})
+
+
+def test_both_unreachable_are_forgotten(monkeypatch):
+    def execute_on_host(host, queries, params_list=None):
+        raise proxy_app.DBConnectionError(f"{host} down")
+
+    monkeypatch.setattr(proxy_app, "execute_on_host", execute_on_host)
+    monkeypatch.setattr(config, "HEDGE_DELAY_MS", 10)
+    monkeypatch.setitem(proxy_app.router.state, "worker_latencies", {PRIMARY: 1.0, BACKUP: 2.0})
+
+    with pytest.raises(proxy_app.DBConnectionError):
+        proxy_app.execute_hedged(PRIMARY, BACKUP, ["SELECT 1"])
+    wait_until(lambda: proxy_app.router.state["worker_latencies"] == {})
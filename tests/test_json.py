@@ -0,0 +1,24 @@
+import datetime
+from decimal import Decimal
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+from proxy import app as proxy_app
+
+
+def test_response_encoding_matches_flask():
+    when = datetime.datetime(2006, 2, 15, 5, 3, 42)
+    day = datetime.date(2006, 2, 15)
+    row = {"last_update": when, "release": day, "rate": Decimal("4.99"), "features": {"Trailers"}}
+
+    with proxy_app.app.app_context():
+        body = orjson.loads(proxy_app.json_response(row).get_data())
+
+    assert body == {
+        "last_update": DefaultJSONProvider.default(when),
+        "release": DefaultJSONProvider.default(day),
+        "rate": "4.99",
+        "features": ["Trailers"],
+    }
+    assert body["last_update"] == "Wed, 15 Feb 2006 05:03:42 GMT"
@@ -0,0 +1,67 @@
+import threading
+
+from proxy import config
+from proxy.strategies import latency_based
+from proxy.strategies.latency_based import record_latency, refresh_latencies
+
+WORKERS = ("10.0.0.2", "10.0.0.3")
+
+
+def test_concurrent_callers_share_one_probe_round(monkeypatch, clock):
+    monkeypatch.setattr(latency_based, "time", clock)
+    release = threading.Event()
+    probes = []
+
+    def tcp_latency(host, port):
+        probes.append(host)
+        release.wait(5)
+        return 0.3
+
+    monkeypatch.setattr(latency_based, "tcp_latency", tcp_latency)
+    state = {"worker_latencies": {}, "latencies_measured_at": 0.0}
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(refresh_latencies(WORKERS, state)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert sorted(probes) == sorted(WORKERS)
+    assert len(results) == 8
+    assert all(r == results[0] for r in results)
+
+
+def test_stale_table_is_served_while_another_caller_probes(monkeypatch, clock):
+    monkeypatch.setattr(latency_based, "time", clock)
+    stale = {WORKERS[0]: 4.0}
+    state = {"worker_latencies": stale, "latencies_measured_at": clock.now}
+    clock.now += config.LATENCY_TTL + 1
+
+    monkeypatch.setattr(latency_based, "tcp_latency", lambda host, port: 0.3)
+    assert latency_based._probe_lock.acquire(blocking=False)
+    try:
+        assert refresh_latencies(WORKERS, state) is stale
+    finally:
+        latency_based._probe_lock.release()
+
+
+def test_new_workers_are_seeded_in_query_time(monkeypatch, clock):
+    monkeypatch.setattr(latency_based, "time", clock)
+    monkeypatch.setattr(latency_based, "tcp_latency", lambda host, port: 0.3)
+    state = {"worker_latencies": {}, "latencies_measured_at": 0.0}
+
+    first = refresh_latencies(WORKERS, state)
+    # No query timings yet: every worker starts equal, whatever its connect time
+    assert first[WORKERS[0]] == first[WORKERS[1]]
+
+    record_latency(state, WORKERS[0], 12.0)
+    state["worker_latencies"] = {WORKERS[0]: state["worker_latencies"][WORKERS[0]]}
+    clock.now += config.LATENCY_TTL + 1
+    refreshed = refresh_latencies(WORKERS, state)
+
+    # A worker that comes back joins at the others' query-time EWMA
+    assert refreshed[WORKERS[1]] == refreshed[WORKERS[0]]
@@ -0,0 +1,83 @@
+from proxy import app as proxy_app
+from proxy import config
+
+CACHED = "SELECT /*+cache*/ COUNT(*) FROM rental"
+
+
+def fake_execute(calls):
+    def execute_on_host(host, queries, params_list=None):
+        calls.append((host, list(queries)))
+        if proxy_app.is_read_query(queries[0]):
+            return [{"columns": ["n"], "rows": [(len(calls),)], "row_count": 1}]
+        return [{"affected_rows": 1}]
+
+    return execute_on_host
+
+
+def test_hinted_read_is_served_from_cache(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(proxy_app, "execute_on_host", fake_execute(calls))
+
+    first = client.post("/sql", json={"query": CACHED, "strategy": "direct"}).get_json()
+    second = client.post("/sql", json={"query": CACHED, "strategy": "direct"}).get_json()
+
+    assert first["host_used"] == config.MANAGER_HOST
+    assert second["host_used"] == "cache"
+    assert second["rows"] == first["rows"]
+    assert len(calls) == 1
+
+
+def test_unhinted_read_is_not_cached(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(proxy_app, "execute_on_host", fake_execute(calls))
+
+    for _ in range(2):
+        client.post("/sql", json={"query": "SELECT COUNT(*) FROM rental", "strategy": "direct"})
+
+    assert len(calls) == 2
+
+
+def test_write_invalidates_cached_reads(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(proxy_app, "execute_on_host", fake_execute(calls))
+
+    client.post("/sql", json={"query": CACHED, "strategy": "direct"})
+    client.post("/sql", json={"query": "INSERT INTO t VALUES (1)", "strategy": "direct"})
+    after = client.post("/sql", json={"query": CACHED, "strategy": "direct"}).get_json()
+
+    assert after["host_used"] == config.MANAGER_HOST
+    assert after["rows"] == [[3]]
+    assert len(calls) == 3
+
+
+def test_entry_expires_after_ttl(monkeypatch, clock):
+    monkeypatch.setattr(proxy_app, "time", clock)
+    monkeypatch.setattr(config, "RESULT_CACHE_TTL", 1.0)
+
+    proxy_app.cache_put(("k",), [{"rows": []}])
+    assert proxy_app.cache_get(("k",)) == [{"rows": []}]
+
+    clock.now += 1.0
+    assert proxy_app.cache_get(("k",)) is None
+    assert ("k",) not in proxy_app._result_cache
+
+
+def test_oldest_entry_is_evicted(monkeypatch):
+    monkeypatch.setattr(config, "RESULT_CACHE_MAX_ENTRIES", 2)
+
+    for key in ("a", "b", "c"):
+        proxy_app.cache_put((key,), [{"key": key}])
+
+    assert proxy_app.cache_get(("a",)) is None
+    assert proxy_app.cache_get(("b",)) == [{"key": "b"}]
+    assert proxy_app.cache_get(("c",)) == [{"key": "c"}]
+
+
+def test_results_over_byte_limit_are_not_stored(monkeypatch):
+    monkeypatch.setattr(config, "RESULT_CACHE_MAX_BYTES", 64)
+
+    proxy_app.cache_put(("small",), [{"rows": [(1,)]}])
+    proxy_app.cache_put(("large",), [{"rows": [("x" * 100,)]}])
+
+    assert proxy_app.cache_get(("small",)) is not None
+    assert proxy_app.cache_get(("large",)) is None
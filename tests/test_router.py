@@ -0,0 +1,62 @@
+from proxy import config
+from proxy import router as router_module
+from proxy.router import Router, is_read_query
+
+
+def test_read_classifier():
+    assert is_read_query("  select * from film")
+    assert is_read_query("SELECT*FROM film")
+    assert is_read_query("SHOW TABLES")
+    assert not is_read_query("INSERT INTO film VALUES (1)")
+    assert not is_read_query("selection")
+
+
+def test_reads_after_write_are_pinned_until_window_ends(monkeypatch, clock):
+    monkeypatch.setattr(router_module, "time", clock)
+    monkeypatch.setattr(config, "RYW_WINDOW", 3.0)
+    router = Router()
+
+    assert router.choose_target("random", "write", client="c1") == router.manager_host
+    assert router.choose_target("random", "read", client="c1") == router.manager_host
+    # Other clients aren't affected
+    assert router.choose_target("random", "read", client="c2") in router.worker_hosts
+
+    clock.now += 3.0
+    assert router.choose_target("random", "read", client="c1") in router.worker_hosts
+    # The expired entry is dropped
+    assert "c1" not in router._recent_writes
+
+
+def test_pinning_disabled_without_client_or_window(monkeypatch):
+    router = Router()
+    assert router.choose_target("random", "write") == router.manager_host
+    assert router.choose_target("random", "read") in router.worker_hosts
+
+    monkeypatch.setattr(config, "RYW_WINDOW", 0)
+    router.choose_target("random", "write", client="c1")
+    assert router.choose_target("random", "read", client="c1") in router.worker_hosts
+
+
+def test_oldest_writer_is_forgotten_past_max_clients(monkeypatch):
+    monkeypatch.setattr(config, "RYW_MAX_CLIENTS", 2)
+    router = Router()
+
+    for client in ("c1", "c2", "c3"):
+        router.choose_target("direct", "write", client=client)
+
+    assert list(router._recent_writes) == ["c2", "c3"]
+
+
+def test_strategy_names_are_case_insensitive():
+    router = Router()
+    assert router.get_strategy("Random") is router.strategies["random"]
+    assert router.get_strategy("HEDGED") is router.strategies["hedged"]
+    assert router.get_strategy(None) is router.default_strategy
+    assert router.get_strategy(42) is router.default_strategy
+
+
+def test_unknown_default_strategy_falls_back_to_direct(monkeypatch):
+    monkeypatch.setattr(config, "DEFAULT_STRATEGY", "fastest")
+    router = Router()
+    assert router.default_strategy is router.strategies["direct"]
+    assert router.get_strategy("nope") is router.strategies["direct"]